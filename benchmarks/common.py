@@ -0,0 +1,26 @@
+"""Общие для замеров функции: перцентили и сводка по задержкам."""
+import statistics
+
+
+def percentiles(latencies):
+    """p50/p90/p99/max задержки в миллисекундах."""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    points = statistics.quantiles(ordered, n=100, method='inclusive')
+    return {
+        'p50_ms': points[49] * 1000,
+        'p90_ms': points[89] * 1000,
+        'p99_ms': points[98] * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def summarize(latencies, elapsed):
+    """Пропускная способность и перцентили для серии замеров."""
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        **percentiles(latencies),
+    }
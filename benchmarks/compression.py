@@ -0,0 +1,130 @@
+"""
+Объём хранения и задержка страницы заметки со сжатым текстом.
+
+    python -m benchmarks.compression --sizes 1000,100000,1000000 \\
+        --notes 20 --requests 50 --json compression.json
+
+Для каждого размера текста (в байтах, текст похож на лог) засевает
+заметки дважды: без сжатия (порог бесконечный) и со сжатием, как в
+модели. Результат — байты в столбце text, размер файла базы после VACUUM,
+время загрузки заметки из БД и время ответа NoteDetail без кеша
+фрагментов.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+USERNAME = 'bench-compression'
+LEVELS = ('INFO', 'DEBUG', 'WARNING', 'ERROR')
+
+
+def log_text(size, rng):
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            f'2024-05-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:'
+            f'{rng.randint(0, 59):02d} {rng.choice(LEVELS)} '
+            f'request id={rng.randrange(10 ** 6)} '
+            f'took {rng.randint(1, 900)} ms\n'
+        )
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines)[:size]
+
+
+def database_size(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='1000,100000,1000000')
+    parser.add_argument('--notes', type=int, default=20,
+                        help='Заметок каждого размера.')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from benchmarks.common import percentiles
+    from notes.models import Note
+
+    call_command('migrate', verbosity=0)
+    field = Note._meta.get_field('text')
+    default_threshold = field.threshold
+    User = get_user_model()
+    results = {'meta': {'notes': args.notes, 'requests': args.requests}}
+    for size in map(int, args.sizes.split(',')):
+        rng = random.Random(size)
+        texts = [log_text(size, rng) for _ in range(args.notes)]
+        results[size] = {}
+        for mode, threshold in (('plain', math.inf),
+                                ('zlib', default_threshold)):
+            field.threshold = threshold
+            User.objects.filter(username=USERNAME).delete()
+            user = User.objects.create(username=USERNAME)
+            notes = [
+                Note.objects.create(
+                    title=f'Лог {index}', text=text,
+                    slug=f'{USERNAME}-{index}', author=user,
+                )
+                for index, text in enumerate(texts)
+            ]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT SUM(LENGTH(text)) FROM notes_note '
+                    'WHERE author_id = %s', [user.pk]
+                )
+                column_bytes = cursor.fetchone()[0]
+            load = []
+            for _ in range(args.requests):
+                note = rng.choice(notes)
+                started = time.perf_counter()
+                Note.objects.get(pk=note.pk).text
+                load.append(time.perf_counter() - started)
+            client = Client()
+            client.force_login(user)
+            detail = []
+            for _ in range(args.requests):
+                caches['notes'].clear()
+                url = reverse('notes:detail', args=(rng.choice(notes).slug,))
+                started = time.perf_counter()
+                client.get(url)
+                detail.append(time.perf_counter() - started)
+            results[size][mode] = {
+                'column_bytes': column_bytes,
+                'database_bytes': database_size(connection),
+                'load': percentiles(load),
+                'detail': percentiles(detail),
+            }
+    field.threshold = default_threshold
+    User.objects.filter(username=USERNAME).delete()
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
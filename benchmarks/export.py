@@ -0,0 +1,101 @@
+"""
+Потоковая выгрузка заметок в ZIP: время до первого байта и память.
+
+    python -m benchmarks.export --notes 100000 --json export.json
+
+Засевает пользователя с notes заметками и скачивает notes:export через
+тестовый клиент, не собирая ответ целиком. Результат — время до первого
+куска, общее время, размер архива и пик памяти Python (tracemalloc) во
+время выгрузки. Память растёт только на центральный каталог ZIP (запись
+на файл), тексты заметок не накапливаются.
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+USERNAME = 'bench-export'
+
+
+def download(client, url):
+    """Скачивает архив по кускам, не собирая его в памяти."""
+    started = time.perf_counter()
+    response = client.get(url)
+    chunks = iter(response.streaming_content)
+    size = len(next(chunks))
+    first_byte_s = time.perf_counter() - started
+    for chunk in chunks:
+        size += len(chunk)
+    total_s = time.perf_counter() - started
+    response.close()
+    return {
+        'first_byte_ms': first_byte_s * 1000,
+        'total_s': total_s,
+        'archive_bytes': size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    User.objects.filter(username=USERNAME).delete()
+    user = User.objects.create(username=USERNAME)
+    seed_started = time.perf_counter()
+    Note.objects.bulk_create(
+        (
+            Note(
+                title=f'Заметка {index}',
+                text='Съешь же ещё этих мягких французских булок.\n' * 20,
+                slug=f'{USERNAME}-{index}',
+                author=user,
+            )
+            for index in range(args.notes)
+        ),
+        batch_size=1000,
+    )
+    seed_s = time.perf_counter() - seed_started
+
+    client = Client()
+    client.force_login(user)
+    timing = download(client, reverse('notes:export'))
+    # Память — отдельным проходом: трассировка сильно замедляет выгрузку.
+    tracemalloc.start()
+    download(client, reverse('notes:export'))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    User.objects.filter(username=USERNAME).delete()
+
+    results = {
+        'notes': args.notes,
+        'seed_s': seed_s,
+        **timing,
+        'notes_per_s': args.notes / timing['total_s'],
+        'peak_python_memory_bytes': peak,
+    }
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Нагрузочный замер HTTP-сервера с постоянными keep-alive соединениями.
+
+Сравнение WSGI и ASGI: запустить проект одним и другим сервером и
+прогнать один и тот же сценарий, например
+
+    gunicorn yanote.wsgi -w 4 --threads 8 -b 127.0.0.1:8000
+    uvicorn yanote.asgi:application --workers 4 --port 8001
+
+    python -m benchmarks.http_load http://127.0.0.1:8000/notes/ \\
+        --connections 1000 --duration 30 --cookie "sessionid=..." \\
+        --label wsgi --json wsgi.json
+    python -m benchmarks.http_load http://127.0.0.1:8001/async/notes/ \\
+        --connections 1000 --duration 30 --cookie "sessionid=..." \\
+        --label asgi --json asgi.json
+
+Результат — запросы в секунду и перцентили задержки, в stdout и JSON.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import percentiles
+
+
+async def read_response(reader):
+    """Читает один ответ HTTP/1.1 и возвращает его статус."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Сервер закрыл соединение.')
+    status = int(status_line.split()[1])
+    length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status
+
+
+async def worker(url, cookie, deadline, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    request = (
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {parts.netloc}\r\n'
+        'Connection: keep-alive\r\n'
+        + (f'Cookie: {cookie}\r\n' if cookie else '')
+        + '\r\n'
+    ).encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname, parts.port or 80
+                )
+            started = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError,
+                ValueError, IndexError) as error:
+            errors.append(type(error).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, connections, duration, cookie=None):
+    latencies = []
+    errors = []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        worker(url, cookie, deadline, latencies, errors)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'connections': connections,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        **percentiles(latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('url')
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--cookie', help='Заголовок Cookie, например сессия.')
+    parser.add_argument('--label', default='', help='Метка в результате.')
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+    result = asyncio.run(
+        run(args.url, args.connections, args.duration, args.cookie)
+    )
+    result['label'] = args.label
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
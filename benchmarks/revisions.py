@@ -0,0 +1,112 @@
+"""
+Рост истории правок и время восстановления версий.
+
+    python -m benchmarks.revisions --lines 2000 --edits 5000 \\
+        --interval 50 --json revisions.json
+
+Создаёт заметку из lines строк и правит её edits раз (несколько строк за
+правку), записывая версии через notes.revisions.record. Результат —
+объём истории против полных копий на каждую правку, время записи версии
+и перцентили восстановления случайных версий.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+USERNAME = 'bench-revisions'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--lines', type=int, default=2000)
+    parser.add_argument('--edits', type=int, default=5000)
+    parser.add_argument('--interval', type=int, default=50,
+                        help='Снимок раз в столько версий.')
+    parser.add_argument('--samples', type=int, default=500,
+                        help='Сколько версий восстановить.')
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db.models import Sum
+    from django.db.models.functions import Coalesce, Length
+
+    from benchmarks.common import percentiles
+    from notes import revisions
+    from notes.models import Note, NoteRevision
+
+    settings.NOTES_REVISION_SNAPSHOT_INTERVAL = args.interval
+    settings.NOTES_REVISIONS_KEEP = args.edits + 1
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    User.objects.filter(username=USERNAME).delete()
+    user = User.objects.create(username=USERNAME)
+    rng = random.Random(0)
+    lines = [f'Строка {index}: ' + 'текст ' * 10 + '\n'
+             for index in range(args.lines)]
+    note = Note.objects.create(
+        title='История', text=''.join(lines), slug=USERNAME, author=user
+    )
+
+    full_copies = len(note.text)
+    record_latencies = []
+    for number in range(args.edits):
+        for _ in range(rng.randint(1, 3)):
+            lines[rng.randrange(len(lines))] = f'Правка {number}\n'
+        if rng.random() < 0.2:
+            lines.insert(rng.randrange(len(lines)), f'Вставка {number}\n')
+        note.text = ''.join(lines)
+        full_copies += len(note.text)
+        started = time.perf_counter()
+        revisions.record(note)
+        record_latencies.append(time.perf_counter() - started)
+
+    stored = NoteRevision.objects.filter(note=note).aggregate(
+        snapshots=Coalesce(Sum(Length('snapshot')), 0),
+        deltas=Sum(Length('delta')),
+    )
+    latest = args.edits + 1
+    rebuild_latencies = []
+    for number in rng.sample(range(1, latest + 1),
+                             min(args.samples, latest)):
+        started = time.perf_counter()
+        revisions.rebuild(note.pk, number)
+        rebuild_latencies.append(time.perf_counter() - started)
+    User.objects.filter(username=USERNAME).delete()
+
+    stored_chars = stored['snapshots'] + stored['deltas']
+    results = {
+        'meta': {
+            'lines': args.lines,
+            'edits': args.edits,
+            'interval': args.interval,
+            'django': django.get_version(),
+        },
+        'storage': {
+            'full_copies_chars': full_copies,
+            'stored_chars': stored_chars,
+            'snapshot_chars': stored['snapshots'],
+            'delta_chars': stored['deltas'],
+            'ratio': stored_chars / full_copies,
+        },
+        'record': percentiles(record_latencies),
+        'rebuild': percentiles(rebuild_latencies),
+    }
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
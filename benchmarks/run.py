@@ -0,0 +1,274 @@
+"""
+Замер горячих путей приложения notes.
+
+    python -m benchmarks.run --users 10 --notes 1000 --requests 200 \\
+        --json results.json
+
+Засевает базу (отдельную, см. benchmarks.settings) N пользователями по
+M заметок и прогоняет сценарии list, detail, add (с подбором slug) и login
+дважды: через тестовый клиент Django и через локальный WSGI-сервер.
+Результат — пропускная способность и перцентили задержки в JSON, чтобы
+сравнивать релизы между собой.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookies import SimpleCookie
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+PASSWORD = 'bench-password'
+USER_PREFIX = 'bench-'
+
+
+class TestClientSession:
+    """Запросы через django.test.Client, без сети и CSRF."""
+
+    def __init__(self, user=None):
+        from django.test import Client
+
+        self.client = Client()
+        if user is not None:
+            self.client.force_login(user)
+
+    def get(self, path):
+        return self.client.get(path).status_code
+
+    def post(self, path, data):
+        return self.client.post(path, data).status_code
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Запросы к живому серверу с cookie и CSRF-токеном."""
+
+    def __init__(self, base_url, user=None):
+        self.base_url = base_url
+        self.cookies = {}
+        self.opener = urllib.request.build_opener(NoRedirect)
+        if user is not None:
+            from django.conf import settings
+            from django.test import Client
+
+            client = Client()
+            client.force_login(user)
+            name = settings.SESSION_COOKIE_NAME
+            self.cookies[name] = client.cookies[name].value
+
+    def _open(self, path, data=None, headers=None):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={
+                **(headers or {}),
+                'Cookie': '; '.join(
+                    f'{name}={value}' for name, value in self.cookies.items()
+                ),
+            },
+        )
+        try:
+            response = self.opener.open(request)
+        except urllib.error.HTTPError as error:
+            response = error
+        with response:
+            response.read()
+            for header in response.headers.get_all('Set-Cookie') or ():
+                for name, morsel in SimpleCookie(header).items():
+                    self.cookies[name] = morsel.value
+            return response.status
+
+    def get(self, path):
+        return self._open(path)
+
+    def post(self, path, data):
+        if 'csrftoken' not in self.cookies:
+            self.get(path)
+        return self._open(
+            path,
+            data=urllib.parse.urlencode(data).encode(),
+            headers={
+                'X-CSRFToken': self.cookies.get('csrftoken', ''),
+                'Referer': self.base_url + path,
+            },
+        )
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_wsgi_server():
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server(
+        '127.0.0.1', 0, get_wsgi_application(),
+        server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def seed(users, notes_per_user):
+    """Пересоздаёт пользователей bench-* с заметками."""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from notes.models import Note
+    from notes.signals import notes_bulk_changed
+
+    User = get_user_model()
+    User.objects.filter(username__startswith=USER_PREFIX).delete()
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(username=f'{USER_PREFIX}{index}', password=password)
+        for index in range(users)
+    )
+    seeded = list(User.objects.filter(username__startswith=USER_PREFIX))
+    for user in seeded:
+        Note.objects.bulk_create(
+            (
+                Note(
+                    title=f'Заметка номер {index}',
+                    text='Съешь же ещё этих мягких французских булок. ' * 20,
+                    slug=f'{user.username}-{index}',
+                    author=user,
+                )
+                for index in range(notes_per_user)
+            ),
+            batch_size=1000,
+        )
+        notes_bulk_changed.send(
+            sender=Note,
+            note_ids=list(
+                Note.objects.filter(author=user).values_list('pk', flat=True)
+            ),
+            author_ids=[user.pk],
+            using='default',
+        )
+    return seeded
+
+
+def measure(action, requests, warmup=5):
+    """Выполняет action requests раз; возвращает сводку и число ошибок."""
+    from benchmarks.common import summarize
+
+    for _ in range(warmup):
+        action()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        status = action()
+        latencies.append(time.perf_counter() - request_started)
+        if status >= 400:
+            errors += 1
+    result = summarize(latencies, time.perf_counter() - started)
+    result['errors'] = errors
+    return result
+
+
+def scenarios(make_session, user, notes_per_user):
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    session = make_session(user)
+    slugs = itertools.cycle(
+        Note.objects.filter(author=user)
+        .values_list('slug', flat=True)[:notes_per_user]
+    )
+    counter = itertools.count()
+    return {
+        'list': lambda: session.get(reverse('notes:list')),
+        'detail': lambda: session.get(
+            reverse('notes:detail', args=(next(slugs),))
+        ),
+        'add': lambda: session.post(reverse('notes:add'), {
+            'title': f'Новая заметка про бенчмарк {next(counter)}',
+            'text': 'Текст',
+        }),
+        'login': lambda: make_session(None).post(reverse('users:login'), {
+            'username': user.username, 'password': PASSWORD,
+        }),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замер горячих путей notes.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=1000,
+                        help='Заметок на пользователя.')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов на сценарий.')
+    parser.add_argument('--modes', default='test_client,wsgi')
+    parser.add_argument('--json', help='Куда записать результат.')
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    seed_started = time.perf_counter()
+    users = seed(args.users, args.notes)
+    results = {
+        'meta': {
+            'users': args.users,
+            'notes_per_user': args.notes,
+            'requests': args.requests,
+            'seed_s': time.perf_counter() - seed_started,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'timestamp': time.time(),
+        },
+        'results': {},
+    }
+    modes = args.modes.split(',')
+    if 'test_client' in modes:
+        results['results']['test_client'] = {
+            name: measure(action, args.requests)
+            for name, action in scenarios(
+                TestClientSession, users[0], args.notes
+            ).items()
+        }
+    if 'wsgi' in modes:
+        server, base_url = start_wsgi_server()
+        try:
+            results['results']['wsgi'] = {
+                name: measure(action, args.requests)
+                for name, action in scenarios(
+                    lambda user: HttpSession(base_url, user),
+                    users[-1], args.notes,
+                ).items()
+            }
+        finally:
+            server.shutdown()
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
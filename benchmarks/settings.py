@@ -0,0 +1,29 @@
+"""
+Настройки для замеров: отдельная база, чтобы не трогать рабочую.
+
+YANOTE_BENCH_ENGINE подменяет бэкенд, например django.db.backends.sqlite3
+для сравнения с настройками по умолчанию.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from yanote.settings import *  # noqa: F401,F403
+from yanote.settings import DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'ENGINE': os.environ.get(
+            'YANOTE_BENCH_ENGINE', DATABASES['default']['ENGINE']
+        ),
+        'NAME': os.environ.get(
+            'YANOTE_BENCH_DB',
+            Path(tempfile.gettempdir()) / 'yanote-bench.sqlite3',
+        ),
+    },
+}
+
+# Без лимитов: иначе сценарий add меряет в основном быстрые ответы 429.
+NOTES_RATE_LIMITS = {}
@@ -0,0 +1,76 @@
+"""
+Микробенчмарк транслитерации заголовков в slug.
+
+    python -m benchmarks.slugify --titles 10000 --repeat 5 --json out.json
+
+Сравнивает pytils.translit.slugify, notes.translit.slugify на уникальных и
+повторяющихся заголовках (LRU-кеш) и пакетный slugify_many.
+"""
+import argparse
+import json
+import random
+import time
+
+from pytils.translit import slugify as pytils_slugify
+
+from notes import translit
+
+WORDS = (
+    'Заметка', 'про', 'ёжика', 'в', 'тумане', 'Список', 'покупок', 'на',
+    'неделю', '«Идеи»', '—', 'черновик', '№', '42', '&', 'Todo', 'Щи',
+)
+
+
+def make_titles(count, unique, seed=0):
+    rng = random.Random(seed)
+    pool = [
+        ' '.join(rng.choices(WORDS, k=rng.randint(2, 8)))
+        + f' {index}'
+        for index in range(unique)
+    ]
+    return [pool[index % unique] for index in range(count)]
+
+
+def best_of(func, titles, repeat):
+    timings = []
+    for _ in range(repeat):
+        translit._memo_slugify.cache_clear()
+        started = time.perf_counter()
+        func(titles)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {'best_s': best, 'titles_per_s': len(titles) / best}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--titles', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+    unique = make_titles(args.titles, args.titles)
+    repeated = make_titles(args.titles, max(args.titles // 100, 1))
+    results = {}
+    for label, titles in (('unique', unique), ('repeated', repeated)):
+        results[label] = {
+            'pytils': best_of(
+                lambda items: [pytils_slugify(item) for item in items],
+                titles, args.repeat,
+            ),
+            'translit': best_of(
+                lambda items: [translit.slugify(item) for item in items],
+                titles, args.repeat,
+            ),
+            'translit_many': best_of(
+                translit.slugify_many, titles, args.repeat
+            ),
+        }
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Чтение заметок под параллельной записью на разных бэкендах sqlite.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 \\
+        --duration 10 --json sqlite.json
+
+Для каждого профиля (yanote.db.sqlite3 и стандартный
+django.db.backends.sqlite3) в отдельном процессе создаётся чистая база,
+после чего потоки-читатели выбирают страницу списка и заметку по slug,
+а потоки-писатели создают и правят заметки. Результат — чтения и записи
+в секунду, перцентили задержки чтения и ошибки вида «database is locked».
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+PROFILES = {
+    'tuned': 'yanote.db.sqlite3',
+    'default': 'django.db.backends.sqlite3',
+}
+
+
+def run_profile(args):
+    """Выполняется в дочернем процессе с уже выбранным бэкендом."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+    from django.db import OperationalError, connection, transaction
+
+    from benchmarks.common import summarize
+    from benchmarks.run import seed
+    from notes.models import Note
+
+    call_command('migrate', verbosity=0)
+    user = seed(1, args.notes)[0]
+    slugs = list(
+        Note.objects.filter(author=user).values_list('slug', flat=True)
+    )
+    ids = list(Note.objects.filter(author=user).values_list('pk', flat=True))
+    connection.close()
+
+    stop = threading.Event()
+    read_latencies = []
+    writes = Counter()
+    errors = Counter()
+
+    def reader():
+        rng = random.Random()
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    list(
+                        Note.objects.filter(author=user)
+                        .only('id', 'slug', 'title')
+                        .order_by('id')[:100]
+                    )
+                    Note.objects.filter(slug=rng.choice(slugs)).first()
+                except OperationalError as error:
+                    errors[str(error)] += 1
+                    continue
+                read_latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    def writer(number):
+        rng = random.Random(number)
+        counter = 0
+        try:
+            while not stop.is_set():
+                counter += 1
+                try:
+                    with transaction.atomic():
+                        Note.objects.create(
+                            title=f'Запись {number} {counter}',
+                            text='Текст',
+                            author=user,
+                        )
+                    writes['create'] += 1
+                    Note.objects.filter(pk=rng.choice(ids)).update(
+                        text=f'Правка {counter}'
+                    )
+                    writes['update'] += 1
+                except OperationalError as error:
+                    errors[str(error)] += 1
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=reader) for _ in range(args.readers)
+    ] + [
+        threading.Thread(target=writer, args=(number,))
+        for number in range(args.writers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    reads = summarize(read_latencies, elapsed)
+    return {
+        'engine': os.environ.get('YANOTE_BENCH_ENGINE'),
+        'reads': reads,
+        'writes': dict(writes),
+        'writes_per_s': sum(writes.values()) / elapsed,
+        'errors': dict(errors),
+    }
+
+
+def spawn(profile, args):
+    database = Path(tempfile.gettempdir()) / f'yanote-{profile}.sqlite3'
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{database}{suffix}').unlink(missing_ok=True)
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.settings',
+        'YANOTE_BENCH_ENGINE': PROFILES[profile],
+        'YANOTE_BENCH_DB': str(database),
+    }
+    output = subprocess.run(
+        [
+            sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+            '--child',
+            '--readers', str(args.readers),
+            '--writers', str(args.writers),
+            '--notes', str(args.notes),
+            '--duration', str(args.duration),
+        ],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--profiles', default='tuned,default')
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+    results = {
+        profile: spawn(profile, args)
+        for profile in args.profiles.split(',')
+    }
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Фильтр списка заметок по меткам и папкам.
+
+    python -m benchmarks.tags --notes 50000 --json tags.json
+
+Засевает пользователя с notes заметками, метками разной частоты (от
+половины заметок до долей процента) и папками, затем замеряет первую
+страницу notes:list с фильтрами так же, как её строит NotesList:
+выбор плана по меткам, выборка страницы и prefetch меток. Результат —
+перцентили по каждому фильтру и число подходящих под него заметок.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+USERNAME = 'bench-tags'
+
+# Метка и доля заметок, у которых она есть.
+TAGS = {
+    'частая': 0.5,
+    'обычная': 0.1,
+    'редкая': 0.01,
+    'уникальная': 0.001,
+}
+
+FILTERS = {
+    'частая': {'names': ['частая']},
+    'редкая': {'names': ['редкая']},
+    'частая и обычная': {'names': ['частая', 'обычная']},
+    'частая и редкая': {'names': ['частая', 'редкая']},
+    'редкая или уникальная': {
+        'names': ['редкая', 'уникальная'], 'match_all': False,
+    },
+    'папка': {'folder': 'папка 3'},
+    'папка и обычная': {'folder': 'папка 3', 'names': ['обычная']},
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--notes', type=int, default=50_000)
+    parser.add_argument('--folders', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from benchmarks.common import percentiles
+    from notes import tags
+    from notes.models import Folder, Note, NoteTag
+    from notes.pagination import keyset_paginate
+    from notes.views import NotesList
+
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    User.objects.filter(username=USERNAME).delete()
+    user = User.objects.create(username=USERNAME)
+    rng = random.Random(0)
+    seed_started = time.perf_counter()
+    Folder.objects.bulk_create(
+        Folder(author=user, name=f'папка {index}')
+        for index in range(args.folders)
+    )
+    folders = list(Folder.objects.filter(author=user))
+    Note.objects.bulk_create(
+        (
+            Note(
+                title=f'Заметка {index}', text='текст',
+                slug=f'{USERNAME}-{index}', author=user,
+                folder=rng.choice(folders),
+            )
+            for index in range(args.notes)
+        ),
+        batch_size=1000,
+    )
+    note_ids = list(
+        Note.objects.filter(author=user).values_list('pk', flat=True)
+    )
+    tag_objects = tags.get_tags(user, list(TAGS))
+    NoteTag.objects.bulk_create(
+        (
+            NoteTag(note_id=note_id, tag=tag)
+            for tag in tag_objects
+            for note_id in rng.sample(
+                note_ids, max(1, int(len(note_ids) * TAGS[tag.name]))
+            )
+        ),
+        batch_size=1000,
+    )
+    tags.recount(tag.pk for tag in tag_objects)
+    seed_s = time.perf_counter() - seed_started
+
+    results = {}
+    base = Note.objects.filter(author=user)
+    for label, params in FILTERS.items():
+        latencies = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            queryset = tags.filter_notes(base, user, **params)
+            keyset_paginate(
+                tags.with_tag_list(queryset.only(*NotesList.list_fields)),
+                None,
+                NotesList.page_size,
+            )
+            latencies.append(time.perf_counter() - started)
+        results[label] = {
+            'matches': queryset.count(),
+            **percentiles(latencies),
+        }
+    User.objects.filter(username=USERNAME).delete()
+
+    output = json.dumps(
+        {
+            'meta': {
+                'notes': args.notes,
+                'folders': args.folders,
+                'page_size': NotesList.page_size,
+                'seed_s': seed_s,
+                'django': django.get_version(),
+            },
+            'filters': results,
+        },
+        indent=2,
+        ensure_ascii=False,
+    )
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
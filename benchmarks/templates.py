@@ -0,0 +1,122 @@
+"""
+Время отрисовки notes/list.html с тысячей заметок.
+
+    python -m benchmarks.templates --items 1000 --repeat 200 --json tpl.json
+
+Сравнивает загрузчик без кеша (шаблоны разбираются на каждый рендер),
+кешированный загрузчик с холодным кешем фрагментов и кешированный
+загрузчик с уже закешированной шапкой. Для оценки постоянной части
+(base.html и шапка) также замеряется notes/home.html.
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_backend(loaders):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    options = settings.TEMPLATES[0]['OPTIONS']
+    return DjangoTemplates({
+        'NAME': 'benchmark',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**options, 'loaders': loaders},
+    })
+
+
+def measure(render, repeat, before=None):
+    from benchmarks.common import summarize
+
+    render()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        render_started = time.perf_counter()
+        render()
+        latencies.append(time.perf_counter() - render_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--json', help='Куда записать результат в JSON.')
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import caches
+    from django.test import RequestFactory
+
+    from notes.cache import get_cache
+    from notes.models import Note
+
+    request = RequestFactory().get('/notes/')
+    request.user = get_user_model()(pk=1, username='bench')
+    context = {
+        'object_list': [
+            Note(id=index, slug=f'note-{index}', title=f'Заметка {index}')
+            for index in range(1, args.items + 1)
+        ],
+        'next_cursor': None,
+        # Без таблиц: статистику шапки подставляем вместо запроса.
+        'note_stats': {'note_count': args.items, 'text_length': 0},
+    }
+
+    def renderer(backend, template_name):
+        return lambda: backend.get_template(template_name).render(
+            context, request
+        )
+
+    def clear():
+        for cache in caches.all():
+            cache.clear()
+
+    plain = make_backend(PLAIN_LOADERS)
+    cached = make_backend(
+        [('django.template.loaders.cached.Loader', PLAIN_LOADERS)]
+    )
+    results = {
+        'meta': {
+            'items': args.items,
+            'repeat': args.repeat,
+            'django': django.get_version(),
+        },
+    }
+    for template_name in ('notes/list.html', 'notes/home.html'):
+        results[template_name] = {
+            'plain_loader': measure(
+                renderer(plain, template_name), args.repeat, clear
+            ),
+            'cached_loader': measure(
+                renderer(cached, template_name), args.repeat, clear
+            ),
+            'cached_loader_warm_fragments': measure(
+                renderer(cached, template_name), args.repeat
+            ),
+        }
+    get_cache().clear()
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,156 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.actions import delete_selected
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, QuerySet
 
-from .models import Note
+from . import bulk, search
+from .models import Note, UserNoteStats
+from .pagination import EstimatedCountPaginator
 
-admin.site.register(Note)
+
+class NoteChangeList(ChangeList):
+    """Список без текста заметок: он большой и в колонках не выводится."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('text')
+
+
+class NoteActionForm(ActionForm):
+    author = forms.CharField(
+        label='Новый автор', required=False,
+        help_text='Логин пользователя для действия «Передать автору».',
+    )
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    """
+    Заметки в админке рассчитаны на большую таблицу.
+
+    Число строк без фильтров оценивается, поиск идёт по поисковому
+    индексу, а удаление и передача другому автору выполняются пачками
+    SQL-запросов (notes.bulk), без загрузки и сигналов каждой заметки.
+    """
+    list_display = (
+        'title', 'slug', 'author', 'folder', 'text_length', 'updated_at',
+    )
+    list_select_related = ('author', 'folder')
+    # Без FTS5 поиск идёт по этим полям; см. get_search_results.
+    search_fields = ('=slug', '^title')
+    search_limit = 500
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ('author', 'folder')
+    readonly_fields = ('text_length',)
+    action_form = NoteActionForm
+    actions = ('delete_selected', 'reassign_notes')
+
+    def get_changelist(self, request, **kwargs):
+        return NoteChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term or not search.uses_fts5(queryset.db):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        ids = search.search_ids(
+            None, search_term, limit=self.search_limit, using=queryset.db
+        )
+        return queryset.filter(Q(slug=search_term) | Q(pk__in=ids)), False
+
+    def get_deleted_objects(self, objs, request):
+        """
+        Для выборки — только число заметок вместо дерева всех связей.
+
+        Связи заметки (история, метки, индекс) не защищены от удаления
+        и удаляются вместе с ней, поэтому обходить их не нужно.
+        """
+        if not isinstance(objs, QuerySet):
+            return super().get_deleted_objects(objs, request)
+        count = objs.count()
+        opts = self.model._meta
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(opts.verbose_name)
+        return (
+            [f'{opts.verbose_name_plural}: {count}'],
+            {opts.verbose_name_plural: count},
+            perms_needed,
+            [],
+        )
+
+    def log_deletion(self, request, obj, object_repr):
+        """
+        Внутри действия delete_selected записи журнала не пишутся по одной,
+        а копятся и сохраняются одним bulk_create в delete_queryset.
+        """
+        entries = getattr(request, '_deletion_log', None)
+        if entries is None:
+            return super().log_deletion(request, obj, object_repr)
+        entries.append(LogEntry(
+            user_id=request.user.pk,
+            content_type=ContentType.objects.get_for_model(
+                obj, for_concrete_model=False
+            ),
+            object_id=str(obj.pk),
+            object_repr=object_repr[:200],
+            action_flag=DELETION,
+        ))
+
+    def delete_queryset(self, request, queryset):
+        LogEntry.objects.bulk_create(getattr(request, '_deletion_log', ()))
+        bulk.delete_notes(queryset)
+
+    @admin.action(
+        permissions=('delete',),
+        description='Удалить выбранные заметки',
+    )
+    def delete_selected(self, request, queryset):
+        # Для журнала удалений нужны только id и заголовки.
+        request._deletion_log = []
+        try:
+            return delete_selected(
+                self, request,
+                queryset.select_related(None).only('id', 'title'),
+            )
+        finally:
+            del request._deletion_log
+
+    @admin.action(
+        permissions=('change',),
+        description='Передать автору',
+    )
+    def reassign_notes(self, request, queryset):
+        username = request.POST.get('author', '').strip()
+        author = get_user_model().objects.filter(username=username).first()
+        if author is None:
+            self.message_user(
+                request, f'Пользователь «{username}» не найден.',
+                messages.ERROR,
+            )
+            return
+        count = bulk.reassign_notes(queryset, author)
+        self.message_user(
+            request, f'Передано заметок: {count}.', messages.SUCCESS
+        )
+
+
+@admin.register(UserNoteStats)
+class UserNoteStatsAdmin(admin.ModelAdmin):
+    """Статистика только для просмотра: её ведут сигналы."""
+    list_display = ('user', 'note_count', 'text_length')
+    list_select_related = ('user',)
+    ordering = ('-note_count',)
+    search_fields = ('user__username',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
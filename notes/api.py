@@ -0,0 +1,334 @@
+"""
+JSON API заметок для клиентов синхронизации.
+
+Доступ ограничен так же, как у HTML-представлений, через
+OwnNotesMixin.get_queryset. Пакетный эндпоинт выполняет создание,
+правку и удаление многих заметок одним запросом в одной транзакции.
+"""
+import json
+from http import HTTPStatus
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import generic
+
+from . import revisions, slugs
+from .mixins import OwnNotesMixin
+from .models import Note, NoteRevision
+from .pagination import keyset_paginate, parse_cursor
+from .signals import notes_bulk_changed
+
+API_FIELDS = ('id', 'slug', 'title', 'text', 'updated_at')
+DEFAULT_FIELDS = ('id', 'slug', 'title', 'updated_at')
+WRITABLE_FIELDS = ('title', 'text')
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая отдаётся клиенту как JSON."""
+
+    def __init__(self, errors, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(errors)
+        self.errors = errors
+        self.status = status
+
+
+def parse_fields(requested):
+    """Поля ответа из параметра fields; text отдаём только по запросу."""
+    if not requested:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(requested.split(',')))
+    unknown = set(fields) - set(API_FIELDS)
+    if unknown:
+        raise ApiError({'fields': sorted(unknown)})
+    return fields
+
+
+def notes_page(queryset, params, page_size=100, max_page_size=1000):
+    """Страница списка заметок для API по параметрам fields, limit, after."""
+    fields = parse_fields(params.get('fields'))
+    try:
+        limit = int(params.get('limit', page_size))
+    except ValueError:
+        raise ApiError({'limit': 'Ожидается целое число.'})
+    limit = max(1, min(limit, max_page_size))
+    page = keyset_paginate(
+        queryset.values(*dict.fromkeys(('id', *fields))),
+        parse_cursor(params.get('after')),
+        limit,
+    )
+    return {
+        'results': [
+            {field: row[field] for field in fields}
+            for row in page.object_list
+        ],
+        'next': page.next_cursor,
+    }
+
+
+class NoteApiBase(OwnNotesMixin):
+    """Общая часть API: JSON вместо редиректов и страниц ошибок."""
+    raise_exception = True
+
+    def handle_no_permission(self):
+        return JsonResponse(
+            {'errors': 'Требуется авторизация.'},
+            status=HTTPStatus.UNAUTHORIZED,
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'errors': error.errors}, status=error.status)
+
+    def get_fields(self):
+        return parse_fields(self.request.GET.get('fields'))
+
+
+class NoteApiList(NoteApiBase, generic.View):
+    """Список заметок пользователя с курсорной пагинацией."""
+    read_replica = True
+    page_size = 100
+    max_page_size = 1000
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(notes_page(
+            self.get_queryset(),
+            request.GET,
+            self.page_size,
+            self.max_page_size,
+        ))
+
+
+class NoteApiDetail(NoteApiBase, generic.View):
+    """Одна заметка пользователя."""
+    read_replica = True
+
+    def get(self, request, slug, *args, **kwargs):
+        fields = self.get_fields()
+        row = self.get_queryset().filter(slug=slug).values(*fields).first()
+        if row is None:
+            raise ApiError('Заметка не найдена.', HTTPStatus.NOT_FOUND)
+        return JsonResponse(row)
+
+
+class NoteApiRevisionBase(NoteApiBase, generic.View):
+    read_replica = True
+
+    def get_note_id(self, slug):
+        note_id = self.get_queryset().filter(slug=slug).values_list(
+            'pk', flat=True
+        ).first()
+        if note_id is None:
+            raise ApiError('Заметка не найдена.', HTTPStatus.NOT_FOUND)
+        return note_id
+
+
+class NoteApiRevisions(NoteApiRevisionBase):
+    """Список версий заметки, новые первыми, без текстов."""
+
+    def get(self, request, slug, *args, **kwargs):
+        rows = (
+            NoteRevision.objects.filter(note_id=self.get_note_id(slug))
+            .order_by('-number')
+            .values('number', 'title', 'created_at')
+        )
+        return JsonResponse({'results': list(rows)})
+
+
+class NoteApiRevision(NoteApiRevisionBase):
+    """Заметка в одной из прошлых версий."""
+
+    def get(self, request, slug, number, *args, **kwargs):
+        try:
+            title, text = revisions.rebuild(self.get_note_id(slug), number)
+        except NoteRevision.DoesNotExist:
+            raise ApiError('Версия не найдена.', HTTPStatus.NOT_FOUND)
+        return JsonResponse({'number': number, 'title': title, 'text': text})
+
+
+class NoteApiBatch(NoteApiBase, generic.View):
+    """
+    Пакетное создание, правка и удаление заметок.
+
+    Тело запроса: {"create": [{title, text, slug?}, ...],
+    "update": [{slug, title?, text?}, ...], "delete": [slug, ...]}.
+    Пакет применяется целиком или не применяется вовсе. Slug у
+    существующей заметки через API не меняется: это её идентификатор.
+    """
+    batch_limit = 500
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            raise ApiError('Тело запроса должно быть JSON-объектом.')
+        if not isinstance(payload, dict):
+            raise ApiError('Тело запроса должно быть JSON-объектом.')
+        create = payload.get('create', [])
+        update = payload.get('update', [])
+        delete = payload.get('delete', [])
+        if not all(isinstance(items, list) for items in (create, update,
+                                                          delete)):
+            raise ApiError('create, update и delete должны быть списками.')
+        if len(create) + len(update) + len(delete) > self.batch_limit:
+            raise ApiError(
+                f'В пакете не больше {self.batch_limit} операций.',
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            )
+        try:
+            with transaction.atomic():
+                result = {
+                    'created': self.create_notes(create),
+                    'updated': self.update_notes(update),
+                    'deleted': self.delete_notes(delete),
+                }
+        except IntegrityError:
+            raise ApiError(
+                {'create': 'Slug заняли параллельно, повторите запрос.'},
+                HTTPStatus.CONFLICT,
+            )
+        return JsonResponse(result)
+
+    def validate(self, note, index, errors, exclude=('slug', 'author')):
+        """Проверка полей заметки; явный slug при создании тоже."""
+        try:
+            note.full_clean(exclude=exclude, validate_unique=False)
+        except ValidationError as error:
+            errors[index] = error.message_dict
+
+    @staticmethod
+    def check_types(item, fields, index, errors):
+        """Значения полей из JSON должны быть строками, без приведения."""
+        wrong = {
+            field: 'Ожидается строка.'
+            for field in fields
+            if field in item and not isinstance(item[field], str)
+        }
+        if wrong:
+            errors[index] = wrong
+        return not wrong
+
+    def create_notes(self, items):
+        if not items:
+            return []
+        errors = {}
+        notes = []
+        max_slug_length = Note._meta.get_field('slug').max_length
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = 'Ожидается объект.'
+                continue
+            if not self.check_types(
+                item, ('slug', *WRITABLE_FIELDS), index, errors
+            ):
+                continue
+            note = Note(
+                author=self.request.user,
+                slug=item.get('slug') or '',
+                **{
+                    field: item[field]
+                    for field in WRITABLE_FIELDS if field in item
+                },
+            )
+            self.validate(note, index, errors, exclude=('author',))
+            notes.append(note)
+        explicit = {}
+        for index, note in enumerate(notes):
+            if note.slug in explicit:
+                errors.setdefault(index, note.slug + slugs.WARNING)
+            elif note.slug:
+                explicit[note.slug] = index
+        for slug in Note.objects.filter(slug__in=explicit).values_list(
+            'slug', flat=True
+        ):
+            errors.setdefault(explicit[slug], slug + slugs.WARNING)
+        if errors:
+            raise ApiError({'create': errors})
+        # Явные slug уже проверены и идут первыми, чтобы автоматически
+        # подобранные не заняли их внутри пакета.
+        ordered = sorted(notes, key=lambda note: not note.slug)
+        generated = iter(slugs.slugs_from_titles(
+            [note.title for note in ordered if not note.slug],
+            max_slug_length,
+        ))
+        allocated = slugs.allocate_many(
+            Note.objects.all(),
+            [note.slug or next(generated) for note in ordered],
+            max_slug_length,
+        )
+        for note, slug in zip(ordered, allocated):
+            note.slug = slug
+            note.update_text_length()
+        Note.objects.bulk_create(notes)
+        ids = dict(
+            self.get_queryset()
+            .filter(slug__in=allocated)
+            .values_list('slug', 'id')
+        )
+        created = [{'id': ids[note.slug], 'slug': note.slug} for note in notes]
+        self.send_bulk_changed(list(ids.values()))
+        return created
+
+    def update_notes(self, items):
+        if not items:
+            return []
+        if not all(isinstance(item, dict)
+                   and isinstance(item.get('slug'), str)
+                   for item in items):
+            raise ApiError({'update': 'У каждого элемента должен быть slug.'})
+        notes = self.get_queryset().in_bulk(
+            [item['slug'] for item in items], field_name='slug'
+        )
+        errors = {}
+        now = timezone.now()
+        seen = set()
+        for index, item in enumerate(items):
+            note = notes.get(item['slug'])
+            if note is None:
+                errors[index] = 'Заметка не найдена.'
+                continue
+            if item['slug'] in seen:
+                errors[index] = 'Заметка уже изменяется в этом запросе.'
+                continue
+            seen.add(item['slug'])
+            if not self.check_types(item, WRITABLE_FIELDS, index, errors):
+                continue
+            for field in WRITABLE_FIELDS:
+                if field in item:
+                    setattr(note, field, item[field])
+            note.updated_at = now
+            note.update_text_length()
+            self.validate(note, index, errors)
+        if errors:
+            raise ApiError({'update': errors})
+        for note in notes.values():
+            # После проверки: full_clean не примет выражение в поле.
+            # Открытые формы правки этих заметок увидят конфликт.
+            note.version = F('version') + 1
+        Note.objects.bulk_update(
+            notes.values(),
+            (*WRITABLE_FIELDS, 'text_length', 'updated_at', 'version'),
+        )
+        self.send_bulk_changed([note.pk for note in notes.values()])
+        return list(notes)
+
+    def delete_notes(self, items):
+        if not items:
+            return 0
+        if not all(isinstance(slug, str) for slug in items):
+            raise ApiError({'delete': 'Ожидается список slug.'})
+        # delete() считает и каскадно удалённые строки (историю правок).
+        _, deleted = self.get_queryset().filter(slug__in=items).delete()
+        return deleted.get(Note._meta.label, 0)
+
+    def send_bulk_changed(self, note_ids):
+        notes_bulk_changed.send(
+            sender=Note,
+            note_ids=note_ids,
+            author_ids=[self.request.user.pk],
+            using='default',
+        )
@@ -0,0 +1,31 @@
+"""
+URL JSON API отдельно от HTML-страниц: их подключает и воркер только
+с API (yanote.urls_api), не импортируя представления страниц.
+"""
+from django.urls import path
+
+from notes import api
+
+app_name = 'notes'
+
+urlpatterns = [
+    path('api/notes/', api.NoteApiList.as_view(), name='api_list'),
+    path(
+        'api/notes/batch/', api.NoteApiBatch.as_view(), name='api_batch'
+    ),
+    path(
+        'api/notes/<slug:slug>/',
+        api.NoteApiDetail.as_view(),
+        name='api_detail',
+    ),
+    path(
+        'api/notes/<slug:slug>/revisions/',
+        api.NoteApiRevisions.as_view(),
+        name='api_revisions',
+    ),
+    path(
+        'api/notes/<slug:slug>/revisions/<int:number>/',
+        api.NoteApiRevision.as_view(),
+        name='api_revision',
+    ),
+]
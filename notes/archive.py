@@ -0,0 +1,52 @@
+"""
+Потоковая сборка ZIP-архива.
+
+zipfile умеет писать в поток без seek (с дескрипторами данных после
+каждого файла), поэтому архив отдаётся кусками по мере сборки: в памяти
+лежит только текущий файл, ещё не отданный хвост и записи центрального
+каталога (несколько сотен байт на файл), который пишется в конце.
+"""
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Stream:
+    """Файлоподобный буфер без seek и tell, из которого забирают байты."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    @property
+    def size(self):
+        return len(self.buffer)
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def stream_zip(files, chunk_size=CHUNK_SIZE):
+    """
+    Генератор байтов ZIP-архива.
+
+    files — итерируемое из (имя, date_time, данные), где date_time —
+    кортеж из шести чисел, как в zipfile.ZipInfo.
+    """
+    stream = _Stream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, date_time, data in files:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+            if stream.size >= chunk_size:
+                yield stream.pop()
+    yield stream.pop()
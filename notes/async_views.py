@@ -0,0 +1,101 @@
+"""
+Асинхронные варианты горячих представлений для запуска под ASGI.
+
+В Django 3.2 ORM и кеш только синхронные, поэтому вся работа с БД
+вынесена в sync_to_async(thread_sensitive=True): корутина не держит поток
+из пула, пока ждёт медленного клиента, а запросы к БД идут в одном потоке
+с соединением. После перехода на Django 4.1+ эти вызовы заменяются на
+асинхронный ORM (aget, async for) без изменения самих представлений.
+"""
+from functools import partial, wraps
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .api import ApiError, notes_page
+from .models import Note
+from .pagination import keyset_paginate, parse_cursor
+from .views import NoteDetail, NotesList, note_fragment, note_stamp
+
+
+def run_sync(func, *args, **kwargs):
+    return sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+
+
+def _is_authenticated(request):
+    """Загружает пользователя, чтобы потом не обращаться к БД из корутины."""
+    return request.user.is_authenticated
+
+
+def async_login_required(view=None, *, api=False):
+    """Аналог login_required для корутин; для API отвечает 401 в JSON."""
+    if view is None:
+        return partial(async_login_required, api=api)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await run_sync(_is_authenticated, request):
+            if api:
+                return JsonResponse(
+                    {'errors': 'Требуется авторизация.'},
+                    status=HTTPStatus.UNAUTHORIZED,
+                )
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@async_login_required
+async def notes_list(request):
+    """Список заметок пользователя, как NotesList."""
+    queryset = Note.objects.filter(author=request.user).only(
+        *NotesList.list_fields
+    )
+    page = await run_sync(
+        keyset_paginate,
+        queryset,
+        parse_cursor(request.GET.get('after')),
+        NotesList.page_size,
+    )
+    return await run_sync(render, request, NotesList.template_name, {
+        'object_list': page.object_list,
+        'next_cursor': page.next_cursor,
+    })
+
+
+notes_list.read_replica = True
+
+
+@async_login_required
+async def note_detail(request, slug):
+    """Заметка подробно, как NoteDetail, с тем же кешем фрагментов."""
+    fragment = await run_sync(
+        note_fragment,
+        Note.objects.filter(author=request.user),
+        await run_sync(note_stamp, request, slug),
+        NoteDetail.fragment_template_name,
+    )
+    return await run_sync(
+        render, request, NoteDetail.template_name, {'note_html': fragment}
+    )
+
+
+note_detail.read_replica = True
+
+
+@async_login_required(api=True)
+async def api_notes_list(request):
+    """Список заметок для API, как NoteApiList."""
+    try:
+        payload = await run_sync(
+            notes_page, Note.objects.filter(author=request.user), request.GET
+        )
+    except ApiError as error:
+        return JsonResponse({'errors': error.errors}, status=error.status)
+    return JsonResponse(payload)
+
+
+api_notes_list.read_replica = True
@@ -0,0 +1,73 @@
+"""
+Пользователь запроса из кеша вместо запроса к БД на каждый хит.
+
+Объект пользователя кешируется по id. При чтении из кеша хеш из сессии
+сверяется с get_session_auth_hash() закешированного объекта, как это
+делает django.contrib.auth.get_user: после смены пароля старые сессии
+не проходят проверку. Запись в кеше сбрасывается при сохранении
+и удалении пользователя и при выходе.
+
+Сброс виден только процессам с тем же кешем. Если кеш заметок свой
+у каждого процесса (LocMemCache), пользователь всегда читается из БД:
+иначе смена пароля, блокировка или выход в одном воркере не закрыли бы
+сессию в остальных.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from . import cache
+
+
+def user_key(user_id):
+    return f'notes:user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.get_cache().delete(user_key(user_id))
+
+
+def _cached_user(request):
+    """Пользователь из кеша или None, если его там нет или сессия чужая."""
+    session = request.session
+    try:
+        user_id = auth.get_user_model()._meta.pk.to_python(
+            session[auth.SESSION_KEY]
+        )
+        backend_path = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return None
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    user = cache.get_cache().get(user_key(user_id))
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    if user is None or not session_hash or not constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        return None
+    return user
+
+
+def get_user(request):
+    """Как auth.get_user, но с кешем успешно проверенных пользователей."""
+    if not hasattr(request, '_cached_user'):
+        if not cache.is_shared():
+            request._cached_user = auth.get_user(request)
+            return request._cached_user
+        user = _cached_user(request)
+        if user is None:
+            user = auth.get_user(request)
+            if user.is_authenticated:
+                cache.get_cache().set(user_key(user.pk), user)
+        request._cached_user = user
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, который берёт пользователя из кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -0,0 +1,129 @@
+"""
+Массовое удаление и передача заметок другому автору.
+
+QuerySet.delete() для Note собирает каждую заметку и её связи в память,
+чтобы разослать pre_delete и post_delete; на десятках тысяч заметок это
+минуты. Здесь всё делается пачками UPDATE и DELETE по id, а побочные
+эффекты (поисковый индекс, статистика, кеш) выполняются один раз через
+notes_bulk_changed, как после остальных массовых операций.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import tags
+from .models import Folder, Note, NoteRevision, NoteTag, NoteToken, Tag
+from .signals import notes_bulk_changed
+
+CHUNK_SIZE = 500
+
+
+def _chunks(ids, size=CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _affected(queryset):
+    """id заметок и их авторов одним запросом."""
+    rows = list(queryset.order_by().values_list('pk', 'author_id'))
+    return [pk for pk, _ in rows], {author_id for _, author_id in rows}
+
+
+def _tag_ids(note_ids, using):
+    return set(
+        NoteTag.objects.using(using).filter(note_id__in=note_ids)
+        .values_list('tag_id', flat=True)
+    )
+
+
+def delete_notes(queryset):
+    """Удаляет заметки выборки вместе со связями; возвращает их число."""
+    using = queryset.db
+    note_ids, author_ids = _affected(queryset)
+    if not note_ids:
+        return 0
+    tag_ids = set()
+    with transaction.atomic(using=using):
+        for chunk in _chunks(note_ids):
+            tag_ids |= _tag_ids(chunk, using)
+            for model in (NoteRevision, NoteTag, NoteToken):
+                model.objects.using(using).filter(note_id__in=chunk).delete()
+            Note.objects.using(using).filter(pk__in=chunk)._raw_delete(using)
+        tags.recount(tag_ids, using=using)
+        notes_bulk_changed.send(
+            sender=Note, note_ids=note_ids, author_ids=author_ids,
+            using=using,
+        )
+    return len(note_ids)
+
+
+def _move_folders(chunk, author, using):
+    """Папки заметок заменяются одноимёнными папками нового автора."""
+    names = dict(
+        Folder.objects.using(using)
+        .filter(notes__pk__in=chunk)
+        .exclude(author=author)
+        .values_list('pk', 'name')
+        .distinct()
+    )
+    for folder_id, name in names.items():
+        Note.objects.using(using).filter(
+            pk__in=chunk, folder_id=folder_id
+        ).update(folder=tags.get_folder(author.pk, name, using=using))
+
+
+def _move_tags(chunk, author, using):
+    """
+    Метки заметок заменяются одноимёнными метками нового автора.
+
+    Возвращает id старых и новых меток для пересчёта note_count.
+    """
+    old = dict(
+        Tag.objects.using(using)
+        .filter(pk__in=NoteTag.objects.filter(
+            note_id__in=chunk
+        ).values('tag_id'))
+        .exclude(author=author)
+        .values_list('pk', 'name')
+    )
+    if not old:
+        return set()
+    new = {
+        tag.name: tag.pk
+        for tag in tags.get_tags(
+            author.pk, sorted(set(old.values())), using=using
+        )
+    }
+    for tag_id, name in old.items():
+        # У заметки все метки одного автора, а у автора имена меток
+        # уникальны, поэтому замена не создаёт повторных связей.
+        NoteTag.objects.using(using).filter(
+            note_id__in=chunk, tag_id=tag_id
+        ).update(tag_id=new[name])
+    return {*old, *new.values()}
+
+
+def reassign_notes(queryset, author):
+    """
+    Передаёт заметки выборки автору author; возвращает их число.
+
+    Папки и метки переносятся по имени: у нового автора используются
+    его одноимённые, а недостающие создаются.
+    """
+    using = queryset.db
+    note_ids, author_ids = _affected(queryset.exclude(author=author))
+    if not note_ids:
+        return 0
+    tag_ids = set()
+    with transaction.atomic(using=using):
+        for chunk in _chunks(note_ids):
+            _move_folders(chunk, author, using)
+            tag_ids |= _move_tags(chunk, author, using)
+            Note.objects.using(using).filter(pk__in=chunk).update(
+                author=author, updated_at=timezone.now()
+            )
+        tags.recount(tag_ids, using=using)
+        notes_bulk_changed.send(
+            sender=Note, note_ids=note_ids,
+            author_ids={*author_ids, author.pk}, using=using,
+        )
+    return len(note_ids)
@@ -0,0 +1,86 @@
+"""
+Кеш отрисованных фрагментов страницы заметки.
+
+Ключ фрагмента — (id, version) заметки, прочитанные из БД тем же
+запросом, что и ETag. Версия растёт при каждом сохранении, а БД общая
+для всех процессов, поэтому правка в одном воркере сразу меняет ключ и
+в остальных, даже с LocMemCache. Старые фрагменты просто перестают
+читаться и вытесняются бэкендом.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.utils.safestring import mark_safe
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+# Бэкенды, у которых в каждом процессе своё содержимое.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def is_shared(alias=None):
+    """
+    Кеш общий для всех процессов (Redis, Memcached, БД, файлы).
+
+    Запись, сброшенная в LocMemCache одного воркера, в остальных остаётся.
+    """
+    backend = settings.CACHES[alias or settings.NOTES_CACHE_ALIAS]['BACKEND']
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+
+def detail_key(note_id, version):
+    """
+    Ключ фрагмента страницы заметки.
+
+    Версию нужно прочитать до самой заметки: если заметку изменят
+    в промежутке, фрагмент ляжет под устаревшую версию и не будет прочитан.
+    """
+    return f'notes:detail:{note_id}:{version}'
+
+
+def get_fragment(key):
+    fragment = get_cache().get(key)
+    stats.record(hit=fragment is not None)
+    return None if fragment is None else mark_safe(fragment)
+
+
+def set_fragment(key, fragment, timeout=DEFAULT_TIMEOUT):
+    get_cache().set(key, str(fragment), timeout)
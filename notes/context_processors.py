@@ -0,0 +1,22 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import stats
+
+
+def note_stats(request):
+    """
+    Статистика заметок пользователя для шапки.
+
+    Ленивая: число заметок — часть ключа кеша шапки, поэтому её читают
+    на каждой странице с шапкой. Страница заметки уже получила её вместе
+    со штампом заметки (views.note_stamp), второй раз не читаем.
+    """
+    def get():
+        user = request.user
+        if not user.is_authenticated:
+            return {}
+        return (
+            getattr(request, '_note_stats', None) or stats.for_user(user.pk)
+        )
+
+    return {'note_stats': SimpleLazyObject(get)}
@@ -0,0 +1,71 @@
+"""
+Текстовое поле, которое хранит длинные тексты сжатыми.
+
+В БД это BLOB: первый байт — метка формата, дальше данные. PLAIN — текст
+в UTF-8 как есть, ZLIB — UTF-8, сжатый zlib. Сжимаются только тексты
+длиннее threshold байт и только если это дало выигрыш. Строки, записанные
+до перехода на поле (обычный TEXT), читаются как есть.
+
+Поиск по полю средствами SQL (icontains и т. п.) не работает: для этого
+есть поисковый индекс.
+"""
+import zlib
+
+from django.db import models
+
+PLAIN = 0
+ZLIB = 1
+
+
+def encode(text, threshold, level=6):
+    data = text.encode()
+    if len(data) > threshold:
+        packed = zlib.compress(data, level)
+        if len(packed) < len(data):
+            return bytes((ZLIB,)) + packed
+    return bytes((PLAIN,)) + data
+
+
+def decode(value):
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value:
+        return ''
+    kind, data = value[0], value[1:]
+    if kind == ZLIB:
+        data = zlib.decompress(data)
+    elif kind != PLAIN:
+        raise ValueError(f'Неизвестный формат сжатого текста: {kind}.')
+    return data.decode()
+
+
+class CompressedTextField(models.TextField):
+    """TextField с хранением в сжатом виде; в Python это обычная строка."""
+
+    def __init__(self, *args, threshold=1024, level=6, **kwargs):
+        self.threshold = threshold
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold != 1024:
+            kwargs['threshold'] = self.threshold
+        if self.level != 6:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        return connection.Database.Binary(
+            encode(value, self.threshold, self.level)
+        )
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decode(value)
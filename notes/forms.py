@@ -1,28 +1,104 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
-from .models import Note
-
-WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+from . import tags
+from .models import Folder, Note, Tag
+from .slugs import WARNING
 
 
 class NoteForm(forms.ModelForm):
-    """Форма для создания или обновления заметки."""
+    """
+    Форма для создания или обновления заметки.
+
+    Папка и метки вводятся текстом; несуществующие создаются при
+    сохранении.
+    """
+    folder = forms.CharField(
+        label='Папка',
+        max_length=Folder._meta.get_field('name').max_length,
+        required=False,
+        help_text='Необязательно',
+    )
+    tags = forms.CharField(
+        label='Метки',
+        required=False,
+        help_text='Через запятую',
+    )
+    # Версия заметки и её заголовок и текст на момент открытия формы:
+    # по версии сохранение узнаёт о параллельной правке, а с заголовком
+    # и текстом её можно слить с правкой пользователя (notes.merge).
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+    base_title = forms.CharField(
+        widget=forms.HiddenInput, required=False, strip=False
+    )
+    base_text = forms.CharField(
+        widget=forms.HiddenInput, required=False, strip=False
+    )
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        note = self.instance
+        if note.pk is not None:
+            self.initial.setdefault(
+                'folder', note.folder.name if note.folder_id else ''
+            )
+            self.initial.setdefault('tags', ', '.join(
+                note.tags.order_by('name').values_list('name', flat=True)
+            ))
+            self.initial.setdefault('version', note.version)
+            self.initial.setdefault('base_title', note.title)
+            self.initial.setdefault('base_text', note.text)
+
+    def clean_tags(self):
+        names = tags.parse_names(self.cleaned_data['tags'])
+        max_length = Tag._meta.get_field('name').max_length
+        too_long = [name for name in names if len(name) > max_length]
+        if too_long:
+            raise ValidationError(
+                f'Метка длиннее {max_length} символов: {too_long[0]}'
+            )
+        return names
+
+    def save(self, commit=True):
+        """Сохранение с версией из формы; NoteConflict, если она устарела."""
+        version = self.cleaned_data.get('version')
+        if self.instance.pk is not None and version is not None:
+            self.instance.version = version
+        # По author_id: на правке автор заметки не загружен.
+        self.instance.folder = tags.get_folder(
+            self.instance.author_id, self.cleaned_data['folder']
+        )
+        return super().save(commit)
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        names = self.cleaned_data['tags']
+        if names or self.initial.get('tags'):
+            self.instance.tags.set(
+                tags.get_tags(self.instance.author_id, names)
+            )
+
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подберёт Note.save() с суффиксом при совпадении.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """Slug уже проверен в clean_slug, повторный запрос не нужен."""
+        exclude = set(self._get_validation_exclusions()) | {'slug'}
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
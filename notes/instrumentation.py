@@ -0,0 +1,163 @@
+"""
+Учёт SQL-запросов запроса: количество, время в БД и повторы.
+
+Повтор одного и того же шаблона запроса (fingerprint) несколько раз за
+запрос — типичный признак N+1. QueryRecorder используется и в middleware,
+и в pytest-фикстуре query_budget.
+
+Соединения с БД у Django свои в каждом потоке, а под ASGI запросы к БД
+идут в потоках sync_to_async. Поэтому на каждом соединении стоит один
+постоянный execute_wrapper, а активные записи хранятся в ContextVar:
+контекст копируется в поток sync_to_async вместе с вызовом.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('notes.queries')
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+SPACES_RE = re.compile(r'\s+')
+
+_recorders = ContextVar('notes_query_recorders', default=())
+
+
+def fingerprint(sql):
+    """Шаблон запроса: списки IN (...) схлопнуты, пробелы нормализованы."""
+    return SPACES_RE.sub(' ', IN_LIST_RE.sub('IN (...)', sql)).strip()
+
+
+def _record_query(execute, sql, params, many, context):
+    """Отдаёт запрос и его время всем записям текущего контекста."""
+    recorders = _recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.queries.append((sql, duration))
+
+
+def install(connection):
+    # В начало списка: execute_wrapper() снимает свою обёртку с конца.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+class QueryRecorder:
+    """Записывает запросы, выполненные в контексте record()."""
+
+    def __init__(self):
+        self.queries = []
+
+    @contextmanager
+    def record(self):
+        for connection in connections.all():
+            install(connection)
+        token = _recorders.set((*_recorders.get(), self))
+        try:
+            yield self
+        finally:
+            _recorders.reset(token)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def duplicates(self):
+        """Шаблоны, выполненные больше одного раза, и число повторов."""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    def report(self):
+        lines = [
+            f'{self.count} запросов, {self.db_time * 1000:.1f} мс в БД'
+        ]
+        lines.extend(
+            f'  x{count}: {sql}' for sql, count in self.duplicates.items()
+        )
+        return '\n'.join(lines)
+
+
+class QueryBudgetMiddleware:
+    """
+    Отдаёт статистику запросов в заголовках и пишет её в лог.
+
+    Заголовки X-DB-Queries, X-DB-Duplicates и Server-Timing (db и app —
+    время в БД и всё остальное, включая отрисовку шаблона). Превышение
+    бюджета из NOTES_QUERY_BUDGETS для имени URL и повторы запросов
+    пишутся в лог notes.queries с уровнем WARNING.
+
+    Работает и под ASGI без перехода в синхронный поток: он стоит первым,
+    и синхронный вариант выстроил бы все запросы в очередь к одному потоку.
+    """
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.add_stats(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = await self.get_response(request)
+        return self.add_stats(request, response, recorder, started)
+
+    def add_stats(self, request, response, recorder, started):
+        total = time.perf_counter() - started
+        db_time = recorder.db_time
+        duplicates = recorder.duplicates
+        response['X-DB-Queries'] = str(recorder.count)
+        response['X-DB-Duplicates'] = str(sum(duplicates.values()))
+        response['Server-Timing'] = (
+            f'db;dur={db_time * 1000:.2f}, '
+            f'app;dur={(total - db_time) * 1000:.2f}'
+        )
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = getattr(settings, 'NOTES_QUERY_BUDGETS', {}).get(view_name)
+        level = logging.INFO
+        if duplicates or (budget is not None and recorder.count > budget):
+            level = logging.WARNING
+        logger.log(
+            level,
+            '%s %s: %d запросов (бюджет %s), db %.1f мс, app %.1f мс, '
+            'повторов %d',
+            request.method, view_name, recorder.count, budget,
+            db_time * 1000, (total - db_time) * 1000,
+            sum(duplicates.values()),
+        )
+        return response
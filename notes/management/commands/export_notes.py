@@ -0,0 +1,77 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import Note
+
+FIELDS = ('title', 'text', 'slug', 'author')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки в NDJSON или CSV потоково, '
+        'не загружая их в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output', default='-',
+            help='Файл для выгрузки, по умолчанию stdout.',
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default=None,
+            help='Формат выгрузки; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--author', help='Выгрузить заметки только этого пользователя.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        file_format = options['format'] or (
+            'csv' if output.endswith('.csv') else 'ndjson'
+        )
+        queryset = Note.objects.order_by('id')
+        if options['author']:
+            queryset = queryset.filter(author__username=options['author'])
+        rows = queryset.values_list(
+            'title', 'text', 'slug', 'author__username'
+        ).iterator(chunk_size=options['chunk_size'])
+        if output == '-':
+            stream = self.stdout
+        else:
+            try:
+                stream = open(output, 'w', encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+        started = time.perf_counter()
+        try:
+            count = self.write(stream, rows, file_format)
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        # Итог в stderr: при выгрузке в stdout он не смешается с данными.
+        self.stderr.write(
+            f'Выгружено {count} заметок за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def write(self, stream, rows, file_format):
+        count = 0
+        if file_format == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+            return count
+        for row in rows:
+            stream.write(
+                json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
+            )
+            count += 1
+        return count
@@ -0,0 +1,193 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notes import slugs
+from notes.models import Note
+from notes.signals import notes_bulk_changed
+
+STRING_FIELDS = ('title', 'text', 'slug', 'author')
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    csv.field_size_limit(sys.maxsize)
+    yield from csv.DictReader(stream)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из NDJSON или CSV пачками через bulk_create, '
+        'не держа файл в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками или - для stdin.')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default=None,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--author',
+            help='Назначить все заметки этому пользователю.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        reader = read_csv if file_format == 'csv' else read_ndjson
+        self.author_id = None
+        if options['author']:
+            self.author_id = self.get_authors([options['author']]).get(
+                options['author']
+            )
+            if self.author_id is None:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+        started = time.perf_counter()
+        imported = skipped = 0
+        try:
+            rows = reader(stream)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                created, missing = self.import_batch(
+                    batch, imported + skipped + 1
+                )
+                imported += created
+                skipped += missing
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Загружено {imported} заметок, пропущено {skipped} '
+            f'за {elapsed:.2f} с '
+            f'({imported / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def get_authors(self, usernames):
+        return {
+            user.username: user.pk
+            for user in get_user_model().objects.filter(
+                username__in=set(usernames)
+            ).only('pk', 'username')
+        }
+
+    def check_row(self, row, authors):
+        """Автор записи или текст ошибки, из-за которой её пропускаем."""
+        if not isinstance(row, dict):
+            return None, 'ожидается объект'
+        wrong = [
+            field for field in STRING_FIELDS
+            if field in row and not isinstance(row[field], str)
+        ]
+        if wrong:
+            return None, f'не строка в полях {", ".join(wrong)}'
+        if not row.get('title'):
+            return None, 'нет заголовка'
+        author_id = self.author_id or authors.get(row.get('author'))
+        if author_id is None:
+            return None, f'пользователь «{row.get("author")}» не найден'
+        return author_id, None
+
+    def skip(self, number, error):
+        self.stderr.write(f'Запись {number}: {error}, пропущена.')
+
+    def import_batch(self, batch, first_number):
+        """
+        Создаёт заметки одной пачки.
+
+        Записи без автора, заголовка или с неверными полями пропускаются
+        с сообщением в stderr. Если явный slug занят, заметка получает
+        его с суффиксом, и об этом тоже сообщается.
+        """
+        authors = {}
+        if self.author_id is None:
+            authors = self.get_authors(
+                row['author'] for row in batch
+                if isinstance(row, dict) and isinstance(row.get('author'), str)
+            )
+        valid = []
+        for number, row in enumerate(batch, first_number):
+            author_id, error = self.check_row(row, authors)
+            if error:
+                self.skip(number, error)
+            else:
+                valid.append((number, row, author_id))
+        max_slug_length = Note._meta.get_field('slug').max_length
+        generated = slugs.slugs_from_titles(
+            [row['title'] for _, row, _ in valid], max_slug_length
+        )
+        notes = []
+        explicit = []
+        for (number, row, author_id), slug in zip(valid, generated):
+            note = Note(
+                title=row['title'],
+                text=row.get('text', ''),
+                slug=row.get('slug') or slug,
+                author_id=author_id,
+            )
+            note.update_text_length()
+            try:
+                note.full_clean(exclude=('author',), validate_unique=False)
+            except ValidationError as error:
+                self.skip(number, '; '.join(
+                    f'{field}: {" ".join(messages)}'
+                    for field, messages in error.message_dict.items()
+                ))
+                continue
+            notes.append(note)
+            explicit.append((number, row.get('slug')))
+        if not notes:
+            return 0, len(batch)
+        with transaction.atomic():
+            allocated = slugs.allocate_many(
+                Note.objects.all(), [note.slug for note in notes],
+                max_slug_length,
+            )
+            for note, slug, (number, wanted) in zip(
+                notes, allocated, explicit
+            ):
+                note.slug = slug
+                if wanted and wanted != slug:
+                    self.stderr.write(
+                        f'Запись {number}: slug «{wanted}» занят, '
+                        f'заметка сохранена как «{slug}».'
+                    )
+            Note.objects.bulk_create(notes)
+            note_ids = list(
+                Note.objects.filter(slug__in=allocated)
+                .values_list('pk', flat=True)
+            )
+            notes_bulk_changed.send(
+                sender=Note,
+                note_ids=note_ids,
+                author_ids={note.author_id for note in notes},
+                using='default',
+            )
+        return len(notes), len(batch) - len(notes)
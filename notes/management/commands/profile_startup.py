@@ -0,0 +1,75 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notes import startup
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет холодный старт процесса: шаги до готовности к первому '
+        'запросу и самые медленные импорты модулей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settings-module', default=None,
+            help='Модуль настроек для замера; по умолчанию текущий.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько самых медленных модулей показать.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз запускать процесс; время — медиана.',
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат одним JSON-объектом.',
+        )
+
+    def handle(self, *args, **options):
+        settings_module = (
+            options['settings_module'] or settings.SETTINGS_MODULE
+        )
+        profiles = [
+            startup.profile(settings_module, importtime=False)
+            for _ in range(max(options['repeat'], 1))
+        ]
+        profiles.sort(key=lambda result: result['total_ms'])
+        median = profiles[len(profiles) // 2]
+        total_ms = median['total_ms']
+        profile = startup.profile(settings_module)
+        slowest = sorted(
+            profile['imports'].items(), key=lambda item: -item[1][0]
+        )[:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'settings': settings_module,
+                'total_ms': round(total_ms, 1),
+                'timeline': median['timeline'],
+                'modules': len(profile['modules']),
+                'slowest_imports': [
+                    {'module': name, 'self_ms': own, 'cumulative_ms': total}
+                    for name, (own, total) in slowest
+                ],
+            }, indent=2))
+            return
+        self.stdout.write(
+            f'{settings_module}: старт {total_ms:.0f} мс '
+            f'(медиана из {len(profiles)} запусков), '
+            f'модулей загружено: {len(profile["modules"])}'
+        )
+        self.stdout.write('\nШаги, мс от начала:')
+        previous = 0
+        for step, at in median['timeline']:
+            self.stdout.write(f'  {at:8.1f}  +{at - previous:7.1f}  {step}')
+            previous = at
+        self.stdout.write(
+            '\nМедленные импорты (с -X importtime), мс, '
+            'собственное / с зависимостями:'
+        )
+        for name, (own, total) in slowest:
+            self.stdout.write(f'  {own:7.1f}  {total:8.1f}  {name}')
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from notes import stats
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет статистику заметок пользователей с самими заметками '
+        'и исправляет расхождения, пачками по пользователям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько пользователей пересчитывать за один проход.',
+        )
+        parser.add_argument(
+            '--lengths', action='store_true',
+            help='Сначала пересчитать длины текстов самих заметок.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        chunk_size = options['chunk_size']
+        if options['lengths']:
+            fixed = self.recompute_lengths(chunk_size)
+            self.stdout.write(f'Исправлено длин текстов: {fixed}')
+        users = get_user_model().objects.order_by('pk').values_list(
+            'pk', flat=True
+        )
+        last_id = None
+        checked = fixed = 0
+        while True:
+            chunk = users if last_id is None else users.filter(
+                pk__gt=last_id
+            )
+            user_ids = list(chunk[:chunk_size])
+            if not user_ids:
+                break
+            fixed += stats.recompute(user_ids)
+            checked += len(user_ids)
+            last_id = user_ids[-1]
+        self.stdout.write(
+            f'Проверено пользователей: {checked}, исправлено: {fixed} '
+            f'за {time.perf_counter() - started:.2f} с'
+        )
+
+    def recompute_lengths(self, chunk_size):
+        """Длины по тексту заметок, пачками по id."""
+        fixed = 0
+        last_id = 0
+        while True:
+            notes = list(
+                Note.objects.filter(pk__gt=last_id).order_by('pk')
+                .only('id', 'text', 'text_length')[:chunk_size]
+            )
+            if not notes:
+                break
+            last_id = notes[-1].pk
+            changed = [
+                note for note in notes
+                if note.text_length != len(note.text)
+            ]
+            for note in changed:
+                note.update_text_length()
+            Note.objects.bulk_update(changed, ('text_length',))
+            fixed += len(changed)
+        return fixed
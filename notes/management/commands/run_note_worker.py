@@ -0,0 +1,98 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from notes import tasks
+
+
+def close_inherited_connections():
+    """
+    Инициализатор процесса пула.
+
+    Пул порождает процессы лениво, при первых задачах, когда родитель уже
+    снова открыл соединение: копию его соединения дочерний процесс
+    закрывает и открывает своё.
+    """
+    connections.close_all()
+
+
+def run_task(task_id):
+    """tasks.run в потоке или процессе пула со своими соединениями."""
+    close_old_connections()
+    try:
+        tasks.run(task_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи заметок из очереди в БД.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Размер пула; 0 — выполнять задачи в этом же потоке.',
+        )
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread',
+            help='Потоки подходят для SQLite и задач, ждущих БД; процессы — '
+                 'для задач, упирающихся в CPU.',
+        )
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--stats-interval', type=float, default=60.0,
+            help='Как часто писать в лог глубину очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить всё, что готово, и выйти.',
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Вывести состояние очереди в JSON и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(tasks.queue_stats()))
+            return
+        workers = options['workers']
+        if not workers:
+            self.loop(lambda ids: list(map(tasks.run, ids)), options)
+            return
+        if options['pool'] == 'process':
+            executor = ProcessPoolExecutor(
+                workers, initializer=close_inherited_connections
+            )
+        else:
+            executor = ThreadPoolExecutor(workers)
+        with executor:
+            self.loop(
+                lambda ids: list(executor.map(run_task, ids)), options
+            )
+
+    def loop(self, run_batch, options):
+        done = 0
+        reported = time.monotonic()
+        while True:
+            ids = tasks.claim(options['batch_size'])
+            if ids:
+                run_batch(ids)
+                done += len(ids)
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
+            if time.monotonic() - reported >= options['stats_interval']:
+                tasks.logger.info(
+                    'Очередь задач: %s', json.dumps(tasks.queue_stats())
+                )
+                reported = time.monotonic()
+        self.stderr.write(f'Выполнено задач: {done}')
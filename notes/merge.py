@@ -0,0 +1,105 @@
+"""
+Трёхстороннее слияние параллельных правок заметки.
+
+base — текст, с которого начинали обе правки, mine — правка
+пользователя, theirs — то, что успели сохранить до него. Изменения обеих
+сторон относительно base ищутся построчно через difflib. Непересекающиеся
+изменения применяются вместе; пересекающиеся (и соседние) — конфликт,
+кроме случая, когда обе стороны сделали одно и то же. В конфликте
+остаются обе версии между маркерами, как в git.
+"""
+from difflib import SequenceMatcher
+
+MINE, THEIRS = 0, 1
+MARKERS = (
+    '<<<<<<< Ваша правка\n',
+    '=======\n',
+    '>>>>>>> Сохранённая версия\n',
+)
+
+
+def _changes(base, other, side):
+    """Изменения (start, end, строки, сторона): base[start:end] -> строки."""
+    matcher = SequenceMatcher(None, base, other, autojunk=False)
+    return [
+        (start, end, other[other_start:other_end], side)
+        for tag, start, end, other_start, other_end in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def _apply(base, start, end, changes):
+    """Строки base[start:end] с изменениями одной стороны."""
+    lines = []
+    position = start
+    for change_start, change_end, new_lines, _ in changes:
+        lines += base[position:change_start]
+        lines += new_lines
+        position = change_end
+    return lines + base[position:end]
+
+
+def _ending(lines):
+    """Строки конфликта, у последней добавлен перевод строки."""
+    if lines and not lines[-1].endswith('\n'):
+        return [*lines[:-1], lines[-1] + '\n']
+    return lines
+
+
+def merge(base, mine, theirs):
+    """Слитый текст и число конфликтов в нём."""
+    base_lines = base.splitlines(keepends=True)
+    changes = sorted(
+        _changes(base_lines, mine.splitlines(keepends=True), MINE)
+        + _changes(base_lines, theirs.splitlines(keepends=True), THEIRS),
+        key=lambda change: change[:2],
+    )
+    merged = []
+    conflicts = 0
+    position = 0
+    index = 0
+    while index < len(changes):
+        start, end = changes[index][:2]
+        group = [changes[index]]
+        index += 1
+        # Изменения одной стороны всегда разделены общими строками, так
+        # что в группу попадают только пересекающиеся или соседние
+        # изменения разных сторон.
+        while index < len(changes) and changes[index][0] <= end:
+            end = max(end, changes[index][1])
+            group.append(changes[index])
+            index += 1
+        merged += base_lines[position:start]
+        position = end
+        sides = [
+            _apply(base_lines, start, end, [
+                change for change in group if change[3] == side
+            ])
+            for side in (MINE, THEIRS)
+        ]
+        if len({change[3] for change in group}) == 1:
+            merged += sides[group[0][3]]
+        elif sides[MINE] == sides[THEIRS]:
+            merged += sides[MINE]
+        else:
+            conflicts += 1
+            merged += [
+                MARKERS[0], *_ending(sides[MINE]),
+                MARKERS[1], *_ending(sides[THEIRS]),
+                MARKERS[2],
+            ]
+    merged += base_lines[position:]
+    return ''.join(merged), conflicts
+
+
+def merge_value(base, mine, theirs):
+    """
+    Слияние однострочного значения (заголовка): (значение, конфликт).
+
+    При конфликте остаётся значение пользователя.
+    """
+    if theirs in (base, mine):
+        return mine, False
+    if mine == base:
+        return theirs, False
+    return mine, True
@@ -0,0 +1,122 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:04
+
+import re
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия логики notes.search на момент миграции: модуль может измениться,
+# а миграция должна строить индекс так, как он был устроен тогда.
+CHUNK_SIZE = 2000
+FTS_TABLE = 'notes_note_fts'
+MAX_TOKEN_LENGTH = 64
+TITLE_WEIGHT = 3
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    tokens = TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+    return [token[:MAX_TOKEN_LENGTH] for token in tokens]
+
+
+def create_fts_table(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                "title, text, author_id UNINDEXED, "
+                "tokenize='unicode61 remove_diacritics 0')"
+            )
+        except Exception:
+            return False
+    return True
+
+
+def index_chunk(chunk, connection, fts5, NoteToken):
+    if fts5:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (note_id, ' '.join(tokenize(title)),
+                     ' '.join(tokenize(text)), author_id)
+                    for note_id, author_id, title, text in chunk
+                ],
+            )
+        return
+    postings = []
+    for note_id, author_id, title, text in chunk:
+        weights = Counter(tokenize(text))
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        postings.extend(
+            NoteToken(
+                note_id=note_id, author_id=author_id,
+                token=token, weight=weight,
+            )
+            for token, weight in weights.items()
+        )
+    NoteToken.objects.using(connection.alias).bulk_create(
+        postings, batch_size=500
+    )
+
+
+def build_search_index(apps, schema_editor):
+    """Создаёт таблицу FTS5 и индексирует уже существующие заметки."""
+    connection = schema_editor.connection
+    created = create_fts_table(connection)
+    backend = getattr(settings, 'NOTES_SEARCH_BACKEND', 'auto')
+    fts5 = created if backend == 'auto' else backend == 'fts5'
+    Note = apps.get_model('notes', 'Note')
+    NoteToken = apps.get_model('notes', 'NoteToken')
+    rows = Note.objects.using(connection.alias).values_list(
+        'id', 'author_id', 'title', 'text'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        index_chunk(chunk, connection, fts5, NoteToken)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.note')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notetoken',
+            index=models.Index(fields=['author', 'token'], name='note_token_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notetoken',
+            constraint=models.UniqueConstraint(fields=('note', 'token'), name='note_token_unique'),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:29
+
+from itertools import islice
+
+from django.db import migrations
+import notes.fields
+
+CHUNK_SIZE = 500
+FIELDS = (('Note', 'text'), ('NoteRevision', 'snapshot'))
+
+
+def _chunks(model, field_name, alias):
+    rows = model.objects.using(alias).exclude(
+        **{f'{field_name}__isnull': True}
+    ).values_list('pk', field_name).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        yield chunk
+
+
+def compress_texts(apps, schema_editor):
+    """Перезаписывает старые строки TEXT в формат CompressedTextField."""
+    alias = schema_editor.connection.alias
+    for model_name, field_name in FIELDS:
+        model = apps.get_model('notes', model_name)
+        for chunk in _chunks(model, field_name, alias):
+            model.objects.using(alias).bulk_update(
+                [model(pk=pk, **{field_name: value}) for pk, value in chunk],
+                [field_name],
+            )
+
+
+def decompress_texts(apps, schema_editor):
+    """Возвращает тексты в обычный TEXT перед откатом типа столбца."""
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    for model_name, field_name in FIELDS:
+        model = apps.get_model('notes', model_name)
+        field = model._meta.get_field(field_name)
+        sql = (
+            f'UPDATE {quote(model._meta.db_table)} '
+            f'SET {quote(field.column)} = %s '
+            f'WHERE {quote(model._meta.pk.column)} = %s'
+        )
+        for chunk in _chunks(model, field_name, connection.alias):
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    sql, [(value, pk) for pk, value in chunk]
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.AlterField(
+            model_name='noterevision',
+            name='snapshot',
+            field=notes.fields.CompressedTextField(blank=True, null=True, verbose_name='Полный текст'),
+        ),
+        migrations.RunPython(compress_texts, decompress_texts),
+    ]
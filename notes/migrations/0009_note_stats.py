@@ -0,0 +1,77 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:52
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+CHUNK_SIZE = 500
+
+
+def fill_stats(apps, schema_editor):
+    """Считает длины текстов заметок и статистику их авторов."""
+    alias = schema_editor.connection.alias
+    Note = apps.get_model('notes', 'Note')
+    UserNoteStats = apps.get_model('notes', 'UserNoteStats')
+    rows = Note.objects.using(alias).values_list('pk', 'text').iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        Note.objects.using(alias).bulk_update(
+            [Note(pk=pk, text_length=len(text)) for pk, text in chunk],
+            ['text_length'],
+        )
+    totals = {
+        row['author_id']: row
+        for row in Note.objects.using(alias).values('author_id')
+        .annotate(count=Count('id'), length=Sum('text_length'))
+        .order_by()
+    }
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserNoteStats.objects.using(alias).bulk_create(
+        (
+            UserNoteStats(
+                user_id=user_id,
+                note_count=totals.get(user_id, {}).get('count', 0),
+                text_length=totals.get(user_id, {}).get('length') or 0,
+            )
+            for user_id in User.objects.using(alias).values_list(
+                'pk', flat=True
+            ).iterator(chunk_size=CHUNK_SIZE)
+        ),
+        batch_size=CHUNK_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0008_note_tags_folders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserNoteStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='note_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('note_count', models.PositiveIntegerField(default=0, verbose_name='Заметок')),
+                ('text_length', models.PositiveBigIntegerField(default=0, verbose_name='Символов в текстах')),
+            ],
+            options={
+                'verbose_name': 'статистика заметок',
+                'verbose_name_plural': 'статистика заметок',
+            },
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='text_length',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Длина текста'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
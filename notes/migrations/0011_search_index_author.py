@@ -0,0 +1,71 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:12
+
+import re
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations
+
+# Копия логики notes.search на момент миграции, см. 0003.
+CHUNK_SIZE = 2000
+FTS_TABLE = 'notes_note_fts'
+MAX_TOKEN_LENGTH = 64
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    tokens = TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+    return [token[:MAX_TOKEN_LENGTH] for token in tokens]
+
+
+def rebuild_search_index(apps, schema_editor):
+    """
+    Пересоздаёт таблицу FTS5 с индексируемой колонкой автора.
+
+    Таблица токенов не меняется, поэтому переиндексация идёт только при
+    FTS5.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                "title, text, author, "
+                "tokenize='unicode61 remove_diacritics 0')"
+            )
+        except Exception:
+            return
+    if getattr(settings, 'NOTES_SEARCH_BACKEND', 'auto') == 'tokens':
+        return
+    Note = apps.get_model('notes', 'Note')
+    rows = Note.objects.using(connection.alias).values_list(
+        'id', 'author_id', 'title', 'text'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text, author) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (note_id, ' '.join(tokenize(title)),
+                     ' '.join(tokenize(text)), str(author_id))
+                    for note_id, author_id, title, text in chunk
+                ],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_note_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0011_search_index_author'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usernotestats',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+"""
+Общие примеси представлений.
+
+Лежат отдельно от notes.views, чтобы API не импортировал формы
+и шаблоны HTML-представлений.
+"""
+from django.contrib.auth.mixins import LoginRequiredMixin
+
+from .models import Note
+
+
+class OwnNotesMixin(LoginRequiredMixin):
+    """Только для вошедших и только с их собственными заметками."""
+    model = Note
+
+    def get_queryset(self):
+        """Пользователь может работать только со своими заметками."""
+        return self.model.objects.filter(author=self.request.user)
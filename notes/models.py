@@ -1,6 +1,28 @@
 from django.conf import settings
-from django.db import models
-from pytils.translit import slugify
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import slugs
+from .fields import CompressedTextField
+
+# Сколько раз пробуем подобрать slug, если его заняли параллельно.
+SLUG_ATTEMPTS = 5
+# Правка этих полей увеличивает Note.version.
+VERSIONED_FIELDS = {'title', 'text'}
+
+
+class NoteConflict(Exception):
+    """
+    Заметку изменили после того, как её прочитали для правки.
+
+    Как и после IntegrityError, транзакция, в которой сохраняли, должна
+    быть откачена: сохранение оборачивают в свой transaction.atomic().
+    """
+
+    def __init__(self, note):
+        super().__init__(f'Заметка {note.pk} изменена параллельно.')
+        self.note = note
 
 
 class Note(models.Model):
@@ -10,7 +32,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -26,13 +48,320 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
+    text_length = models.PositiveIntegerField(
+        'Длина текста',
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False,
+    )
+    folder = models.ForeignKey(
+        'Folder',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notes',
+        verbose_name='Папка',
+    )
+    tags = models.ManyToManyField(
+        'Tag',
+        through='NoteTag',
+        blank=True,
+        related_name='notes',
+        verbose_name='Метки',
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'),
+                name='note_author_id_idx',
+            ),
+            models.Index(
+                fields=('author', 'updated_at'),
+                name='note_author_updated_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        # Длина на момент чтения: по ней сигналы считают изменение
+        # UserNoteStats.text_length при сохранении.
+        note._loaded_text_length = note.__dict__.get('text_length')
+        return note
+
+    def update_text_length(self):
+        """Пересчитывает text_length по тексту, если текст загружен."""
+        if 'text' in self.__dict__:
+            self.text_length = len(self.text)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        """
+        Правка заголовка или текста — условный UPDATE по версии.
+
+        UPDATE ... SET version = v + 1 WHERE id = ? AND version = v, где v —
+        версия, с которой начиналась правка. Если строку за это время
+        изменили, обновится 0 строк: тогда NoteConflict, а не молчаливая
+        перезапись. Без загруженной версии она только увеличивается.
+        """
+        fields = {field.attname for field, _, _ in values}
+        if not VERSIONED_FIELDS & fields:
+            return super()._do_update(
+                base_qs, using, pk_val, values, update_fields, forced_update
+            )
+        if 'version' not in fields:
+            version = self._meta.get_field('version')
+            return super()._do_update(
+                base_qs, using, pk_val,
+                [*values, (version, None, F('version') + 1)],
+                update_fields, forced_update,
+            )
+        expected = self.version
+        values = [
+            (field, model, expected + 1) if field.attname == 'version'
+            else (field, model, value)
+            for field, model, value in values
+        ]
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values,
+            update_fields, forced_update,
+        )
+        if updated:
+            self.version = expected + 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise NoteConflict(self)
+        return updated
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        self.update_text_length()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'text' in update_fields:
+                update_fields.add('text_length')
+            if VERSIONED_FIELDS & update_fields:
+                update_fields.add('version')
+            kwargs['update_fields'] = update_fields
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugs.slug_from_title(self.title, max_slug_length)
+        queryset = type(self)._default_manager.using(
+            kwargs.get('using') or self._state.db
+        ).exclude(pk=self.pk)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = slugs.allocate(queryset, base, max_slug_length)
+            try:
+                with transaction.atomic(using=queryset.db):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
+
+
+class Folder(models.Model):
+    """Папка заметок; у заметки не больше одной папки."""
+    name = models.CharField('Название', max_length=100)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'name'),
+                name='folder_author_name_unique',
+            ),
+        )
+
+    def __str__(self):
+        return self.name
+
+
+class Tag(models.Model):
+    """
+    Метка заметок пользователя.
+
+    note_count — денормализованное число заметок с меткой, его
+    поддерживают сигналы в notes.signals.
+    """
+    name = models.CharField('Название', max_length=50)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    note_count = models.PositiveIntegerField('Заметок', default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'name'),
+                name='tag_author_name_unique',
+            ),
+        )
+
+    def __str__(self):
+        return self.name
 
+
+class NoteTag(models.Model):
+    """
+    Связь заметки и метки.
+
+    Уникальный индекс (note, tag) служит для меток заметки, индекс
+    (tag, note) — для заметок с меткой: оба читаются без обращения
+    к самой таблице. Отдельный индекс по note поэтому не нужен.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'tag'),
+                name='note_tag_unique',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('tag', 'note'),
+                name='note_tag_tag_note_idx',
+            ),
+        )
+
+
+class NoteToken(models.Model):
+    """Запись инвертированного индекса: токен заметки и его вес."""
+    token = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'token'),
+                name='note_token_unique',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'token'),
+                name='note_token_author_idx',
+            ),
+        )
+
+
+class NoteRevision(models.Model):
+    """
+    Версия заметки: полный текст (снимок) или изменения к предыдущей.
+
+    Формат изменений и восстановление версий — в notes.revisions.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    title = models.CharField('Заголовок', max_length=100)
+    snapshot = CompressedTextField('Полный текст', null=True, blank=True)
+    delta = models.TextField('Изменения', blank=True)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'),
+                name='note_revision_unique',
+            ),
+        )
+
+    @property
+    def is_snapshot(self):
+        return self.snapshot is not None
+
+
+class UserNoteStats(models.Model):
+    """
+    Число заметок пользователя и суммарная длина их текстов.
+
+    Обновляется приращениями из сигналов notes.signals; сверить с
+    заметками и исправить можно командой recompute_note_stats.
+    updated_at сдвигается при каждом изменении: по нему страницы отдают
+    Last-Modified, удаление заметки по её собственному времени не видно.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='note_stats',
+        verbose_name='Пользователь',
+    )
+    note_count = models.PositiveIntegerField('Заметок', default=0)
+    text_length = models.PositiveBigIntegerField(
+        'Символов в текстах', default=0
+    )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'статистика заметок'
+        verbose_name_plural = 'статистика заметок'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.note_count}'
+
+
+class NoteTask(models.Model):
+    """
+    Отложенная задача для воркера run_note_worker, см. notes.tasks.
+
+    Выполненные задачи удаляются; исчерпавшие попытки остаются с failed_at.
+    """
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('failed_at', 'run_at'),
+                name='note_task_due_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,94 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """Страница выборки, полученная по курсору, а не через OFFSET."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def parse_cursor(value):
+    """Преобразует значение курсора из запроса в id, с которого читать."""
+    if value in (None, ''):
+        return None
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        raise Http404('Некорректный курсор страницы.')
+    if cursor < 0:
+        raise Http404('Некорректный курсор страницы.')
+    return cursor
+
+
+def keyset_paginate(queryset, cursor, page_size, key='id'):
+    """
+    Возвращает страницу записей с ключом больше курсора.
+
+    Выборка сортируется по ключу, а лишняя запись сверх размера страницы
+    показывает, есть ли следующая страница. Вместе с индексом
+    (author_id, id) это даёт range scan по индексу на каждую страницу.
+    Подходят и объекты моделей, и словари из values().
+    """
+    if cursor is not None:
+        queryset = queryset.filter(**{f'{key}__gt': cursor})
+    rows = list(queryset.order_by(key)[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = (
+            last[key] if isinstance(last, dict) else getattr(last, key)
+        )
+    return KeysetPage(rows, next_cursor)
+
+
+def estimate_count(queryset):
+    """
+    Примерное число строк таблицы модели без COUNT(*).
+
+    PostgreSQL — по статистике планировщика, остальные базы — по
+    максимальному id: это одна проверка индекса, а дыры от удалений
+    дают лишь завышенную оценку. None, если оценить не удалось.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None
+    top = queryset.model._default_manager.using(queryset.db).aggregate(
+        top=Max('pk')
+    )['top']
+    return top if isinstance(top, int) else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для больших таблиц: без фильтров число строк оценивается.
+
+    Точный COUNT(*) делается для отфильтрованной выборки и для таблиц
+    меньше exact_below строк, где он дёшев.
+    """
+    exact_below = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        return super().count
@@ -1,8 +1,25 @@
+from contextlib import contextmanager
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import AsyncClient
 
+from notes.instrumentation import QueryRecorder
 from notes.models import Note
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def eager_tasks(settings):
+    settings.NOTES_TASKS_EAGER = True
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -14,6 +31,44 @@ def author_client(author, client):
     return client
 
 
+class SyncAsyncClient:
+    """
+    AsyncClient с синхронными методами: запрос идёт через ASGI-обработчик
+    в async_to_sync, а ORM при этом работает в потоке теста, с его
+    транзакцией.
+    """
+
+    def __init__(self, user=None):
+        self.client = AsyncClient()
+        if user is not None:
+            self.client.force_login(user)
+
+    def get(self, *args, **kwargs):
+        async def get():
+            return await self.client.get(*args, **kwargs)
+        return async_to_sync(get)()
+
+    def post(self, *args, **kwargs):
+        async def post():
+            return await self.client.post(*args, **kwargs)
+        return async_to_sync(post)()
+
+
+@pytest.fixture
+def async_anonymous_client():
+    return SyncAsyncClient()
+
+
+@pytest.fixture
+def async_author_client(author):
+    return SyncAsyncClient(author)
+
+
+@pytest.fixture
+def async_admin_client(admin_user):
+    return SyncAsyncClient(admin_user)
+
+
 @pytest.fixture
 def note(author):
     note = Note.objects.create(
@@ -37,3 +92,38 @@ def form_data():
         'text': 'Новый текст',
         'slug': 'new-slug',
     }
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """
+    Кеш, общий для процессов (файловый), и сессии в нём, как в
+    развёртывании с Redis или Memcached.
+    """
+    settings.CACHES = {
+        alias: {
+            **config,
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / alias),
+        }
+        for alias, config in settings.CACHES.items()
+    }
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Контекстный менеджер: падает, если запросов больше бюджета
+    или один и тот же запрос повторяется (признак N+1).
+    """
+    @contextmanager
+    def check(budget, allow_duplicates=False):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        if recorder.count > budget:
+            pytest.fail(f'Бюджет {budget} превышен: {recorder.report()}')
+        if recorder.duplicates and not allow_duplicates:
+            pytest.fail(f'Повторяющиеся запросы: {recorder.report()}')
+    return check
@@ -0,0 +1,122 @@
+import pytest
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.models import DELETION, LogEntry
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+
+from notes import search
+from notes.models import Folder, Note, NoteRevision, Tag, UserNoteStats
+from notes.pagination import EstimatedCountPaginator
+
+pytestmark = pytest.mark.django_db
+
+CHANGELIST_URL = reverse('admin:notes_note_changelist')
+
+
+@pytest.fixture
+def tagged_notes(author):
+    folder = Folder.objects.create(author=author, name='Работа')
+    tag = Tag.objects.create(author=author, name='срочно')
+    notes = [
+        Note.objects.create(
+            title=f'Заметка {index}', text=f'текст номер{index}',
+            slug=f'note-{index}', author=author, folder=folder,
+        )
+        for index in range(3)
+    ]
+    for note in notes:
+        note.tags.add(tag)
+    return notes
+
+
+def test_changelist_queries(admin_client, tagged_notes, query_budget):
+    with query_budget(8) as recorder:
+        response = admin_client.get(CHANGELIST_URL)
+    assert response.status_code == 200
+    assert 'Заметка 2' in response.content.decode()
+    notes_queries = [
+        sql for sql, _ in recorder.queries if 'FROM "notes_note"' in sql
+    ]
+    assert notes_queries
+    assert all('"notes_note"."text"' not in sql for sql in notes_queries)
+
+
+def test_changelist_search(admin_client, tagged_notes):
+    response = admin_client.get(CHANGELIST_URL, {'q': 'номер1'})
+    assert list(response.context['cl'].result_list) == [tagged_notes[1]]
+    response = admin_client.get(CHANGELIST_URL, {'q': 'note-2'})
+    assert list(response.context['cl'].result_list) == [tagged_notes[2]]
+
+
+def test_estimated_count(author, tagged_notes):
+    paginator = EstimatedCountPaginator(Note.objects.order_by('pk'), 2)
+    paginator.exact_below = 0
+    Note.objects.filter(pk=tagged_notes[0].pk).delete()
+    assert paginator.count == tagged_notes[-1].pk
+    filtered = Note.objects.filter(author=author).order_by('pk')
+    paginator = EstimatedCountPaginator(filtered, 2)
+    paginator.exact_below = 0
+    assert paginator.count == 2
+
+
+def test_bulk_delete(admin_client, author, tagged_notes):
+    ids = [note.pk for note in tagged_notes[:2]]
+    response = admin_client.post(CHANGELIST_URL, {
+        'action': 'delete_selected', ACTION_CHECKBOX_NAME: ids, 'post': 'yes',
+    })
+    assert response.status_code == 302
+    assert list(Note.objects.values_list('pk', flat=True)) == [
+        tagged_notes[2].pk
+    ]
+    assert not NoteRevision.objects.filter(note_id__in=ids).exists()
+    assert Tag.objects.get().note_count == 1
+    stats = UserNoteStats.objects.get(user=author)
+    assert (stats.note_count, stats.text_length) == (1, 12)
+    assert search.search_ids(author, 'текст') == [tagged_notes[2].pk]
+
+
+def test_bulk_delete_logs_in_one_insert(admin_client, tagged_notes):
+    ids = [note.pk for note in tagged_notes]
+    with CaptureQueriesContext(connection) as context:
+        admin_client.post(CHANGELIST_URL, {
+            'action': 'delete_selected', ACTION_CHECKBOX_NAME: ids,
+            'post': 'yes',
+        })
+    inserts = [
+        query for query in context.captured_queries
+        if query['sql'].startswith('INSERT INTO "django_admin_log"')
+    ]
+    assert len(inserts) == 1
+    assert sorted(
+        LogEntry.objects.filter(action_flag=DELETION)
+        .values_list('object_repr', flat=True)
+    ) == sorted(note.title for note in tagged_notes)
+
+
+def test_bulk_reassign(admin_client, admin_user, author, tagged_notes):
+    ids = [note.pk for note in tagged_notes[:2]]
+    response = admin_client.post(CHANGELIST_URL, {
+        'action': 'reassign_notes', ACTION_CHECKBOX_NAME: ids,
+        'author': admin_user.username,
+    })
+    assert response.status_code == 302
+    moved = Note.objects.filter(author=admin_user).select_related('folder')
+    assert sorted(note.pk for note in moved) == ids
+    assert {note.folder.author_id for note in moved} == {admin_user.pk}
+    assert dict(Tag.objects.values_list('author_id', 'note_count')) == {
+        author.pk: 1, admin_user.pk: 2,
+    }
+    assert sorted(search.search_ids(admin_user, 'текст')) == ids
+    assert UserNoteStats.objects.get(user=admin_user).note_count == 2
+    assert UserNoteStats.objects.get(user=author).note_count == 1
+
+
+def test_reassign_to_unknown_user(admin_client, tagged_notes):
+    response = admin_client.post(CHANGELIST_URL, {
+        'action': 'reassign_notes',
+        ACTION_CHECKBOX_NAME: [tagged_notes[0].pk],
+        'author': 'нет-такого',
+    }, follow=True)
+    assert 'не найден' in response.content.decode()
+    assert Note.objects.filter(author=tagged_notes[0].author).count() == 3
@@ -0,0 +1,117 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.shortcuts import reverse
+
+from notes import search
+from notes.api import NoteApiBatch
+from notes.models import Note
+
+
+def post_batch(client, payload):
+    return client.post(
+        reverse('notes:api_batch'),
+        data=json.dumps(payload),
+        content_type='application/json',
+    )
+
+
+def test_api_list_hides_text_by_default(note, author_client):
+    response = author_client.get(reverse('notes:api_list'))
+    assert response.status_code == HTTPStatus.OK
+    result, = response.json()['results']
+    assert result['slug'] == note.slug
+    assert 'text' not in result
+
+
+def test_api_list_cursor_and_fields(author, author_client):
+    for index in range(3):
+        Note.objects.create(
+            title=f'Заметка {index}', text='Текст', author=author
+        )
+    url = reverse('notes:api_list')
+    page = author_client.get(url, {'limit': 2, 'fields': 'slug,text'}).json()
+    assert len(page['results']) == 2
+    assert set(page['results'][0]) == {'slug', 'text'}
+    page = author_client.get(url, {'limit': 2, 'after': page['next']}).json()
+    assert len(page['results']) == 1
+    assert page['next'] is None
+
+
+def test_api_requires_login(client):
+    response = client.get(reverse('notes:api_list'))
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_api_detail_scoped_to_author(note, admin_client):
+    url = reverse('notes:api_detail', args=(note.slug,))
+    response = admin_client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_batch(note, author, author_client):
+    payload = {
+        'create': [
+            {'title': 'Новая', 'text': 'Поиск по новой'},
+            {'title': 'Новая', 'text': 'Вторая'},
+            {'title': 'Своя', 'text': 'Текст', 'slug': 'novaya'},
+        ],
+        'update': [{'slug': note.slug, 'text': 'Изменённый текст'}],
+    }
+    response = post_batch(author_client, payload)
+    assert response.status_code == HTTPStatus.OK
+    created = response.json()['created']
+    assert [item['slug'] for item in created] == [
+        'novaya-2', 'novaya-3', 'novaya'
+    ]
+    note.refresh_from_db()
+    assert note.text == 'Изменённый текст'
+    assert created[0]['id'] in search.search_ids(author, 'поиск')
+    response = post_batch(author_client, {'delete': [note.slug]})
+    assert response.json()['deleted'] == 1
+    assert not Note.objects.filter(pk=note.pk).exists()
+
+
+@pytest.mark.parametrize(
+    'payload',
+    (
+        {'create': [{'title': 'Без текста'}]},
+        {'create': [{'title': 'x', 'text': 'y', 'slug': 'note-slug'}]},
+        {'update': [{'slug': 'missing', 'text': 'y'}]},
+        {'create': [{'title': 'x', 'text': 'y', 'slug': 'bad slug/с'}]},
+        {'create': [{'title': 'x', 'text': 'y', 'slug': 5}]},
+        {'create': [{'title': ['x'], 'text': 'y'}]},
+        {'update': [{'slug': ['note-slug'], 'text': 'y'}]},
+        {'update': [{'slug': 'note-slug', 'text': 5}]},
+        {'update': [
+            {'slug': 'note-slug', 'text': 'a'},
+            {'slug': 'note-slug', 'text': 'b'},
+        ]},
+        {'delete': [['note-slug']]},
+    ),
+)
+def test_api_batch_is_atomic(note, author_client, payload):
+    payload.setdefault('create', []).append({'title': 'Ок', 'text': 'Ок'})
+    response = post_batch(author_client, payload)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Note.objects.count() == 1
+
+
+def test_api_batch_duplicate_update(note, author_client):
+    response = post_batch(author_client, {'update': [
+        {'slug': note.slug, 'text': 'Первая правка'},
+        {'slug': note.slug, 'text': 'Вторая правка'},
+    ]})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['errors'] == {
+        'update': {'1': 'Заметка уже изменяется в этом запросе.'}
+    }
+    note.refresh_from_db()
+    assert note.text != 'Первая правка'
+
+
+def test_api_batch_limit(author_client, monkeypatch):
+    monkeypatch.setattr(NoteApiBatch, 'batch_limit', 1)
+    response = post_batch(author_client, {'delete': ['a', 'b']})
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
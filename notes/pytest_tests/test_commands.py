@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from notes import search
+from notes.models import Note
+
+
+@pytest.mark.parametrize('extension', ('ndjson', 'csv'))
+def test_export_import_round_trip(note, author, tmp_path, extension):
+    path = tmp_path / f'notes.{extension}'
+    call_command('export_notes', output=str(path))
+    call_command('import_notes', str(path))
+    assert Note.objects.count() == 2
+    imported = Note.objects.exclude(pk=note.pk).get()
+    assert imported.title == note.title
+    assert imported.text == note.text
+    assert imported.author == author
+    assert imported.slug == f'{note.slug}-2'
+    assert imported.pk in search.search_ids(author, 'текст')
+
+
+def test_export_to_stdout_reports_to_stderr(note):
+    stdout, stderr = StringIO(), StringIO()
+    call_command('export_notes', stdout=stdout, stderr=stderr)
+    assert json.loads(stdout.getvalue())['slug'] == note.slug
+    assert 'Выгружено 1 заметок' in stderr.getvalue()
+
+
+def test_import_skips_unknown_authors(author, tmp_path):
+    path = tmp_path / 'notes.ndjson'
+    rows = (
+        {'title': 'Первая', 'text': 'Текст', 'author': author.username},
+        {'title': 'Первая', 'text': 'Текст', 'author': author.username},
+        {'title': 'Чужая', 'text': 'Текст', 'author': 'нет такого'},
+    )
+    path.write_text(
+        '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows),
+        encoding='utf-8',
+    )
+    call_command('import_notes', str(path), batch_size=2)
+    assert sorted(Note.objects.values_list('slug', flat=True)) == [
+        'pervaya', 'pervaya-2'
+    ]
+
+
+def test_import_reports_invalid_rows(note, author, tmp_path):
+    path = tmp_path / 'notes.ndjson'
+    rows = (
+        {'text': 'Без заголовка'},
+        {'title': 'Плохой slug', 'text': 'Текст', 'slug': 'bad slug/с'},
+        {'title': 5, 'text': 'Текст'},
+        ['не', 'объект'],
+        {'title': 'Занятый', 'text': 'Текст', 'slug': note.slug},
+        {'title': 'Хорошая', 'text': 'Текст'},
+    )
+    path.write_text(
+        '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows),
+        encoding='utf-8',
+    )
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'import_notes', str(path), author=author.username,
+        stdout=stdout, stderr=stderr,
+    )
+    assert sorted(Note.objects.values_list('slug', flat=True)) == [
+        'horoshaya', note.slug, f'{note.slug}-2'
+    ]
+    report = stderr.getvalue()
+    for number in (1, 2, 3, 4):
+        assert f'Запись {number}:' in report
+    assert f'«{note.slug}-2»' in report
+    assert 'пропущено 4' in stdout.getvalue()
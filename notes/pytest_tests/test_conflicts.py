@@ -0,0 +1,169 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.shortcuts import reverse
+
+from notes import merge
+from notes.models import Note, NoteConflict
+
+TEXT = 'первая строка\nвторая строка\nтретья строка'
+
+
+@pytest.fixture
+def note(author):
+    return Note.objects.create(
+        title='Заголовок', text=TEXT, slug='note-slug', author=author
+    )
+
+
+def edit_data(note, **changes):
+    return {
+        'title': note.title, 'text': note.text, 'slug': note.slug,
+        'version': note.version, 'base_title': note.title,
+        'base_text': note.text, **changes,
+    }
+
+
+def test_merge():
+    base = 'a\nb\nc\nd\n'
+    assert merge.merge(base, 'A\nb\nc\nd\n', 'a\nb\nc\nD\n') == (
+        'A\nb\nc\nD\n', 0
+    )
+    assert merge.merge(base, 'a\nb\nc\nd\nx\n', 'a\nb\nc\nd\nx\n') == (
+        'a\nb\nc\nd\nx\n', 0
+    )
+    text, conflicts = merge.merge(base, 'a\nB\nc\nd\n', 'a\nX\nc\nd\n')
+    assert conflicts == 1
+    assert text == (
+        f'a\n{merge.MARKERS[0]}B\n{merge.MARKERS[1]}X\n'
+        f'{merge.MARKERS[2]}c\nd\n'
+    )
+    assert merge.merge_value('a', 'b', 'a') == ('b', False)
+    assert merge.merge_value('a', 'a', 'c') == ('c', False)
+    assert merge.merge_value('a', 'b', 'c') == ('b', True)
+
+
+@pytest.mark.django_db
+def test_stale_instance_conflicts(note):
+    first = Note.objects.get(pk=note.pk)
+    second = Note.objects.get(pk=note.pk)
+    first.text = 'правка из первой вкладки'
+    first.save()
+    assert first.version == 2
+    second.text = 'правка из второй вкладки'
+    with pytest.raises(NoteConflict), transaction.atomic():
+        second.save()
+    note.refresh_from_db()
+    assert (note.text, note.version) == (first.text, 2)
+    # Версия не загружена: UPDATE без проверки, но версия растёт.
+    deferred = Note.objects.only('title').get(pk=note.pk)
+    deferred.title = 'Новый заголовок'
+    deferred.save()
+    assert Note.objects.get(pk=note.pk).version == 3
+
+
+@pytest.mark.django_db
+def test_stale_form_gets_merge(author_client, note):
+    url = reverse('notes:edit', args=(note.slug,))
+    stale = edit_data(note)
+    author_client.post(url, edit_data(
+        note, text=TEXT.replace('первая', 'ПЕРВАЯ')
+    ))
+    response = author_client.post(url, {
+        **stale, 'text': TEXT.replace('третья', 'ТРЕТЬЯ'),
+    })
+    assert response.status_code == HTTPStatus.CONFLICT
+    note.refresh_from_db()
+    assert note.text == TEXT.replace('первая', 'ПЕРВАЯ')
+    form = response.context['form']
+    merged = 'ПЕРВАЯ строка\nвторая строка\nТРЕТЬЯ строка'
+    assert form.initial['text'] == merged
+    assert form.initial['version'] == note.version == 2
+    assert response.context['conflict']['conflicts'] == 0
+
+    response = author_client.post(url, edit_data(note, text=merged))
+    assert response.status_code == HTTPStatus.FOUND
+    note.refresh_from_db()
+    assert (note.text, note.version) == (merged, 3)
+
+
+@pytest.mark.django_db
+def test_api_update_bumps_version(author_client, note):
+    author_client.post(
+        reverse('notes:api_batch'),
+        data={'update': [{'slug': note.slug, 'text': 'Из API'}]},
+        content_type='application/json',
+    )
+    assert Note.objects.get(pk=note.pk).version == 2
+    with pytest.raises(NoteConflict), transaction.atomic():
+        note.save()
+
+
+@pytest.fixture
+def file_db(tmp_path, django_db_blocker):
+    """
+    Алиас файловой базы: у тестовой базы в памяти параллельные
+    писатели получают «table is locked» вместо ожидания.
+    """
+    alias = 'conflicts'
+    connections.databases[alias] = {
+        **connections['default'].settings_dict,
+        'NAME': str(tmp_path / 'db.sqlite3'),
+    }
+    with django_db_blocker.unblock():
+        call_command('migrate', database=alias, verbosity=0)
+        yield alias
+        connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
+
+
+def test_parallel_updates_are_not_lost(file_db):
+    """Каждый поток дописывает свои строки, повторяя при конфликте."""
+    author = get_user_model().objects.db_manager(file_db).create(
+        username='Автор'
+    )
+    note = Note.objects.using(file_db).create(
+        title='Общая', text='', author=author
+    )
+    writers, edits = 4, 5
+    barrier = threading.Barrier(writers)
+    errors = []
+
+    def write(number):
+        try:
+            barrier.wait()
+            for edit in range(edits):
+                while True:
+                    current = Note.objects.using(file_db).get(pk=note.pk)
+                    current.text += f'{number}:{edit}\n'
+                    try:
+                        with transaction.atomic(using=file_db):
+                            current.save()
+                        break
+                    except NoteConflict:
+                        continue
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections[file_db].close()
+
+    threads = [
+        threading.Thread(target=write, args=(number,))
+        for number in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not errors
+    note.refresh_from_db()
+    assert sorted(note.text.splitlines()) == sorted(
+        f'{number}:{edit}'
+        for number in range(writers) for edit in range(edits)
+    )
+    assert note.version == 1 + writers * edits
@@ -1,5 +1,16 @@
+from datetime import timedelta
+from http import HTTPStatus
+
 import pytest
+from django.db import connection
+from django.db.models import F
 from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from notes import cache
+from notes.models import Note, UserNoteStats
+from notes.views import NotesList
 
 
 def test_note_in_list_for_author(note, author_client):
@@ -39,3 +50,149 @@ def test_pages_contains_form(author_client, name, args):
     url = reverse(name, args=args)
     response = author_client.get(url)
     assert 'form' in response.context
+
+
+def test_notes_list_loads_only_list_fields(note, author_client):
+    url = reverse('notes:list')
+    response = author_client.get(url)
+    listed_note = response.context['object_list'][0]
+    assert 'text' in listed_note.get_deferred_fields()
+
+
+def test_notes_list_keyset_pagination(author, author_client, monkeypatch):
+    monkeypatch.setattr(NotesList, 'page_size', 2)
+    notes = Note.objects.bulk_create(
+        Note(title=f'Заметка {i}', text='Текст', slug=f'slug-{i}',
+             author=author)
+        for i in range(3)
+    )
+    url = reverse('notes:list')
+    response = author_client.get(url)
+    first_page = list(response.context['object_list'])
+    assert len(first_page) == 2
+    next_cursor = response.context['next_cursor']
+    assert next_cursor == first_page[-1].id
+    response = author_client.get(url, {'after': next_cursor})
+    second_page = list(response.context['object_list'])
+    assert [note.slug for note in second_page] == [notes[-1].slug]
+    assert response.context['next_cursor'] is None
+
+
+def test_notes_list_bad_cursor(author_client):
+    url = reverse('notes:list')
+    response = author_client.get(url, {'after': 'abc'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_note_detail_served_from_cache(note, author_client):
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    hits = cache.stats.hits
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(url)
+    assert note.text in response.content.decode()
+    assert not any(
+        '"notes_note"."text"' in query['sql'] for query in queries
+    )
+    assert cache.stats.hits == hits + 1
+
+
+def test_note_detail_cache_invalidated_on_update(note, author_client):
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    note.text = 'Обновлённый текст'
+    note.save()
+    response = author_client.get(url)
+    assert 'Обновлённый текст' in response.content.decode()
+
+
+def test_note_detail_cache_shared_through_db(note, author_client):
+    """
+    Правку в другом воркере местный кеш не видит, но ключ фрагмента
+    берётся из версии заметки в БД.
+    """
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    Note.objects.filter(pk=note.pk).update(
+        text='Правка из другого процесса', version=F('version') + 1
+    )
+    response = author_client.get(url)
+    assert 'Правка из другого процесса' in response.content.decode()
+
+
+def test_note_detail_conditional_get(note, author, author_client):
+    url = reverse('notes:detail', args=(note.slug,))
+    response = author_client.get(url)
+    etag = response['ETag']
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    note.save()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    # Число заметок в шапке изменилось, сама заметка — нет.
+    etag = response['ETag']
+    Note.objects.create(title='Ещё', text='Текст', author=author)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'заметок: 2' in response.content.decode()
+
+
+def test_note_count_shared_through_db(note, author, author_client):
+    # Статистику поменял другой процесс: здешний кеш об этом не знает.
+    url = reverse('notes:detail', args=(note.slug,))
+    etag = author_client.get(url)['ETag']
+    author_client.get(reverse('notes:home'))
+    UserNoteStats.objects.filter(user=author).update(note_count=5)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'заметок: 5' in response.content.decode()
+    content = author_client.get(reverse('notes:home')).content.decode()
+    assert 'заметок: 5' in content
+
+
+@pytest.mark.parametrize('name', ('notes:detail', 'notes:list'))
+def test_if_modified_since(name, note, author, author_client):
+    # Время в Last-Modified с точностью до секунды: сдвигаем старые
+    # изменения в прошлое, чтобы новое было заметно.
+    an_hour_ago = timezone.now() - timedelta(hours=1)
+    Note.objects.update(updated_at=an_hour_ago)
+    UserNoteStats.objects.update(updated_at=an_hour_ago)
+    url = reverse(name, args=(note.slug,) if name == 'notes:detail' else ())
+    modified = author_client.get(url)['Last-Modified']
+    response = author_client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    other = Note.objects.create(title='Ещё', text='Текст', author=author)
+    Note.objects.filter(pk=other.pk).update(updated_at=an_hour_ago)
+    other.delete()
+    response = author_client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_notes_list_conditional_get(note, author, author_client):
+    url = reverse('notes:list')
+    etag = author_client.get(url)['ETag']
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    note.delete()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_header_cached_per_user(author, author_client, client):
+    url = reverse('notes:home')
+    assert author.username in author_client.get(url).content.decode()
+    author.username = 'Переименованный'
+    author.save()
+    content = author_client.get(url).content.decode()
+    assert 'Переименованный' in content
+    client.logout()
+    content = client.get(url).content.decode()
+    assert 'Переименованный' not in content
+    assert 'Регистрация' in content
+
+
+def test_header_keyed_on_note_count(author, author_client):
+    url = reverse('notes:home')
+    assert 'заметок: 0' in author_client.get(url).content.decode()
+    Note.objects.create(title='Новая', text='Текст', author=author)
+    assert 'заметок: 1' in author_client.get(url).content.decode()
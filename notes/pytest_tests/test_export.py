@@ -0,0 +1,50 @@
+import io
+import zipfile
+from http import HTTPStatus
+
+import pytest
+from django.shortcuts import reverse
+
+from notes import archive
+from notes.models import Note
+
+
+def read_archive(response):
+    return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+
+def test_export_streams_markdown_archive(author, note, admin_user,
+                                         author_client):
+    Note.objects.create(
+        title='Чужая', text='Текст', slug='other', author=admin_user
+    )
+    response = author_client.get(reverse('notes:export'))
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    assert response['Content-Type'] == 'application/zip'
+    files = read_archive(response)
+    assert files.namelist() == [f'{note.slug}.md']
+    assert files.read(f'{note.slug}.md').decode() == (
+        f'# {note.title}\n\n{note.text}\n'
+    )
+
+
+def test_stream_zip_yields_while_building():
+    files = (
+        (f'{index}.md', (2024, 1, 1, 0, 0, 0), bytes(range(256)) * 8)
+        for index in range(20)
+    )
+    chunks = archive.stream_zip(files, chunk_size=1024)
+    first = next(chunks)
+    assert first.startswith(b'PK')
+    rest = list(chunks)
+    assert len(rest) > 1
+    names = zipfile.ZipFile(io.BytesIO(first + b''.join(rest))).namelist()
+    assert names == [f'{index}.md' for index in range(20)]
+
+
+@pytest.mark.django_db
+def test_export_for_anonymous(client):
+    url = reverse('notes:export')
+    response = client.get(url)
+    assert response.url == f'{reverse("users:login")}?next={url}'
@@ -0,0 +1,37 @@
+import pytest
+from django.db import connection
+
+from notes import fields
+from notes.models import Note
+
+LOG = 'INFO запрос обработан за 12 мс\n' * 5000
+
+
+def stored(note):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT text FROM notes_note WHERE id = %s', [note.pk]
+        )
+        return bytes(cursor.fetchone()[0])
+
+
+@pytest.mark.parametrize('text', ('', 'коротко', LOG))
+def test_encode_decode(text):
+    assert fields.decode(fields.encode(text, threshold=1024)) == text
+
+
+def test_legacy_text_value_read_as_is():
+    assert fields.decode('старый текст') == 'старый текст'
+
+
+def test_large_text_stored_compressed(note):
+    note.text = LOG
+    note.save()
+    raw = stored(note)
+    assert raw[0] == fields.ZLIB
+    assert len(raw) < len(LOG.encode()) / 10
+    assert Note.objects.get(pk=note.pk).text == LOG
+
+
+def test_short_text_stored_plain(note):
+    assert stored(note) == bytes((fields.PLAIN,)) + note.text.encode()
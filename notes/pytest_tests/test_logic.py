@@ -1,10 +1,12 @@
 from http import HTTPStatus
 
 import pytest
+from django.db import IntegrityError
 from django.shortcuts import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 from pytils.translit import slugify
 
+from notes import slugs
 from notes.forms import WARNING
 from notes.models import Note
 
@@ -82,3 +84,56 @@ def test_other_user_cant_delete_note(admin_client, form_data, slug_for_args):
     response = admin_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Note.objects.count() == 1
+
+
+def test_empty_slug_collision_gets_suffix(author_client, note, form_data):
+    url = reverse('notes:add')
+    form_data.pop('slug')
+    form_data['title'] = note.title
+    Note.objects.filter(pk=note.pk).update(slug=slugify(note.title))
+    response = author_client.post(url, data=form_data)
+    assertRedirects(response, reverse('notes:success'))
+    new_note = Note.objects.exclude(pk=note.pk).get()
+    assert new_note.slug == slugify(note.title) + '-2'
+
+
+def test_slug_race_is_retried(author, note, monkeypatch):
+    allocate = slugs.allocate
+    results = iter((note.slug,))
+
+    def allocate_taken_first(*args, **kwargs):
+        return next(results, None) or allocate(*args, **kwargs)
+
+    monkeypatch.setattr(slugs, 'allocate', allocate_taken_first)
+    new_note = Note.objects.create(title='Заголовок', text='x', author=author)
+    assert new_note.slug not in ('', note.slug)
+
+
+def test_slug_taken_concurrently(author_client, note, form_data, monkeypatch):
+    # Проверку формы прошли раньше, чем другая заметка заняла slug.
+    monkeypatch.setattr(Note, 'validate_unique', lambda *args, **kw: None)
+    form_data['slug'] = note.slug
+    response = author_client.post(reverse('notes:add'), data=form_data)
+    assertFormError(response, 'form', 'slug', errors=(note.slug + WARNING))
+    assert Note.objects.count() == 1
+
+
+def test_other_integrity_errors_are_raised(author_client, form_data,
+                                           monkeypatch):
+    def save(*args, **kwargs):
+        raise IntegrityError('FOREIGN KEY constraint failed')
+
+    monkeypatch.setattr(Note, 'save', save)
+    with pytest.raises(IntegrityError):
+        author_client.post(reverse('notes:add'), data=form_data)
+
+
+def test_allocate_many_single_pass(author, django_assert_max_num_queries):
+    Note.objects.create(title='x', text='x', slug='zametka', author=author)
+    Note.objects.create(title='x', text='x', slug='zametka-4', author=author)
+    bases = ['zametka', 'zametka', 'drugaya', 'drugaya', 'novaya']
+    with django_assert_max_num_queries(2):
+        allocated = slugs.allocate_many(Note.objects.all(), bases, 100)
+    assert allocated == [
+        'zametka-5', 'zametka-6', 'drugaya', 'drugaya-2', 'novaya'
+    ]
@@ -0,0 +1,96 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.shortcuts import reverse
+
+from notes import search
+from notes.models import Note
+
+User = get_user_model()
+
+
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('notes:list', None),
+        ('notes:detail', pytest.lazy_fixture('slug_for_args')),
+        ('notes:api_list', None),
+    ),
+)
+def test_views_fit_query_budget(author_client, query_budget, name, args):
+    url = reverse(name, args=args)
+    with query_budget(settings.NOTES_QUERY_BUDGETS[name]):
+        response = author_client.get(url)
+    assert int(response['X-DB-Queries']) <= settings.NOTES_QUERY_BUDGETS[name]
+    assert response['X-DB-Duplicates'] == '0'
+    assert 'db;dur=' in response['Server-Timing']
+
+
+def test_async_view_queries_counted(async_author_client, note):
+    """Под ASGI запросы идут в потоке sync_to_async и тоже считаются."""
+    response = async_author_client.get(reverse('notes:async_list'))
+    assert int(response['X-DB-Queries']) > 0
+
+
+@pytest.mark.parametrize('eager', (True, False))
+def test_create_fits_query_budget(author_client, query_budget, form_data,
+                                  settings, eager):
+    """С очередью задач сохранение ставит одну задачу, без повторов."""
+    settings.NOTES_TASKS_EAGER = eager
+    # Наличие FTS5 определяется один раз на процесс, не на запрос.
+    search.uses_fts5()
+    with query_budget(settings.NOTES_QUERY_BUDGETS['notes:add']):
+        response = author_client.post(reverse('notes:add'), data=form_data)
+    assert response['X-DB-Duplicates'] == '0'
+
+
+def test_query_budget_detects_n_plus_one(author, note, query_budget):
+    Note.objects.create(title='x', text='x', slug='x', author=author)
+    with pytest.raises(pytest.fail.Exception, match='Повторяющиеся'):
+        with query_budget(10):
+            [note.author.username for note in Note.objects.all()]
+
+
+def test_warm_detail_hit_needs_one_query(shared_cache, author_client, note):
+    """Сессия и пользователь из кеша, остаётся только штамп заметки."""
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    response = author_client.get(url)
+    assert response['X-DB-Queries'] == '1'
+
+
+def test_cached_user_dropped_after_password_change(shared_cache,
+                                                   author_client, author,
+                                                   note):
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    author.set_password('new-password')
+    author.save()
+    response = author_client.get(url)
+    assert response.url.startswith(reverse('users:login'))
+
+
+@pytest.mark.parametrize(
+    'revoke',
+    (
+        lambda author: Session.objects.all().delete(),
+        lambda author: User.objects.filter(pk=author.pk).update(
+            password='другой'
+        ),
+        lambda author: User.objects.filter(pk=author.pk).update(
+            is_active=False
+        ),
+    ),
+    ids=('logout', 'password', 'deactivate'),
+)
+def test_revoked_in_other_process(author_client, author, note, revoke):
+    """
+    Выход, смена пароля или блокировка в другом воркере, мимо сигналов
+    этого процесса: с кешем процесса сессия и пользователь берутся из БД.
+    """
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    revoke(author)
+    response = author_client.get(url)
+    assert response.url.startswith(reverse('users:login'))
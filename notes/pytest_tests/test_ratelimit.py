@@ -0,0 +1,89 @@
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+from django.urls import reverse
+
+from notes import ratelimit
+
+pytestmark = pytest.mark.django_db
+
+TOO_MANY_REQUESTS = 429
+
+
+@pytest.fixture(
+    params=('notes.ratelimit.MemoryBackend', 'notes.ratelimit.CacheBackend')
+)
+def limits(request, settings):
+    settings.NOTES_RATE_LIMIT_BACKEND = request.param
+    settings.NOTES_RATE_LIMITS = {'notes:add': '2/m', 'users:signup': '1/h'}
+
+
+def test_bucket_refills_over_time():
+    state, wait = ratelimit.take(None, 2, 60, now=0)
+    state, wait = ratelimit.take(state, 2, 60, now=0)
+    assert wait == 0
+    state, wait = ratelimit.take(state, 2, 60, now=0)
+    assert wait == 30
+    state, wait = ratelimit.take(state, 2, 60, now=15)
+    assert wait == 15
+    state, wait = ratelimit.take(state, 2, 60, now=30)
+    assert wait == 0
+
+
+def test_blocked_before_db_access(
+    limits, shared_cache, author_client, form_data,
+    django_assert_num_queries,
+):
+    url = reverse('notes:add')
+    for index in range(2):
+        form_data['slug'] = f'slug-{index}'
+        response = author_client.post(url, data=form_data)
+        assert response.status_code == HTTPStatus.FOUND
+    with django_assert_num_queries(0):
+        response = author_client.post(url, data=form_data)
+    assert response.status_code == TOO_MANY_REQUESTS
+    assert 0 < int(response['Retry-After']) <= 30
+    assert author_client.get(url).status_code == HTTPStatus.OK
+
+
+def test_limits_are_per_client(limits, author_client, admin_client,
+                               form_data):
+    url = reverse('notes:add')
+    for _ in range(3):
+        author_client.post(url, data=form_data)
+    form_data['slug'] = 'admin-slug'
+    response = admin_client.post(url, data=form_data)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_anonymous_limited_by_ip(limits, client):
+    url = reverse('users:signup')
+    assert client.post(url).status_code == HTTPStatus.OK
+    assert client.post(url).status_code == TOO_MANY_REQUESTS
+    response = client.post(url, REMOTE_ADDR='10.0.0.2')
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_forged_session_cookies_share_ip_bucket(limits, client, settings):
+    url = reverse('users:signup')
+    statuses = []
+    for index in range(3):
+        client.cookies[settings.SESSION_COOKIE_NAME] = f'forged-{index}'
+        statuses.append(client.post(url).status_code)
+    assert statuses == [HTTPStatus.OK, TOO_MANY_REQUESTS, TOO_MANY_REQUESTS]
+
+
+def test_limited_under_asgi(limits, async_author_client, form_data):
+    url = reverse('notes:add')
+    statuses = []
+    for index in range(3):
+        form_data['slug'] = f'slug-{index}'
+        # Multipart в AsyncClient Django 3.2 не читается, шлём форму.
+        statuses.append(async_author_client.post(
+            url, urlencode(form_data),
+            content_type='application/x-www-form-urlencoded',
+        ))
+    assert [response.status_code for response in statuses] == [
+        HTTPStatus.FOUND, HTTPStatus.FOUND, TOO_MANY_REQUESTS
+    ]
@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from notes.models import Note
+from notes.routers import PIN_COOKIE, ReadReplicaRouter, replica_reads
+
+# Тестовые базы default и replica — две независимые sqlite: запись
+# в основную базу на реплике не видна, пока её явно не скопировать.
+pytestmark = pytest.mark.django_db(databases=['default', 'replica'])
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.NOTES_READ_REPLICAS = ['replica']
+    settings.NOTES_PRIMARY_PIN_SECONDS = 60
+
+
+def replicate(author):
+    """Догоняет реплику: копирует автора и его заметки из основной базы."""
+    get_user_model().objects.using('replica').get_or_create(
+        pk=author.pk, defaults={'username': author.username}
+    )
+    for note in Note.objects.using('default').filter(author=author):
+        note.save(using='replica')
+
+
+def test_router_reads_replica_only_when_enabled():
+    router = ReadReplicaRouter()
+    assert router.db_for_read(Note) is None
+    with replica_reads():
+        assert router.db_for_read(Note) == 'replica'
+        assert router.db_for_read(get_user_model()) is None
+
+
+def test_read_views_use_replica(author_client, note):
+    response = author_client.get(reverse('notes:list'))
+    assert note not in response.context['object_list']
+    response = author_client.get(reverse('notes:detail', args=(note.slug,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    replicate(note.author)
+    response = author_client.get(reverse('notes:detail', args=(note.slug,)))
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_write_views_use_primary(author_client, note):
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_reads_pinned_to_primary_after_write(author_client, form_data):
+    response = author_client.post(reverse('notes:add'), data=form_data)
+    assert PIN_COOKIE in response.cookies
+    response = author_client.get(reverse('notes:list'))
+    slugs = [note.slug for note in response.context['object_list']]
+    assert slugs == [form_data['slug']]
+
+    # Окно закончилось, а реплика отстаёт: заметки там ещё нет.
+    del author_client.cookies[PIN_COOKIE]
+    response = author_client.get(reverse('notes:list'))
+    assert list(response.context['object_list']) == []
+
+    replicate(Note.objects.get().author)
+    response = author_client.get(reverse('notes:list'))
+    slugs = [note.slug for note in response.context['object_list']]
+    assert slugs == [form_data['slug']]
+
+
+def test_expired_pin_is_ignored(author_client, note):
+    author_client.cookies[PIN_COOKIE] = '0'
+    response = author_client.get(reverse('notes:list'))
+    assert note not in response.context['object_list']
+
+
+@pytest.mark.parametrize('replicas', (['replica'], []))
+@pytest.mark.parametrize('name', (
+    'notes:list', 'notes:detail', 'notes:async_list', 'notes:async_detail',
+    'notes:api_async_list',
+))
+def test_read_views_under_asgi(settings, async_author_client, note, name,
+                               replicas):
+    """Под ASGI флаг реплики снимается в том же контексте, где ставился."""
+    settings.NOTES_READ_REPLICAS = replicas
+    replicate(note.author)
+    args = (note.slug,) if name.endswith('detail') else ()
+    response = async_author_client.get(reverse(name, args=args))
+    assert response.status_code == HTTPStatus.OK
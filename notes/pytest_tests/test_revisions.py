@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.shortcuts import reverse
+
+from notes import revisions
+from notes.models import NoteRevision
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def small_interval(settings):
+    settings.NOTES_REVISION_SNAPSHOT_INTERVAL = 5
+    settings.NOTES_REVISIONS_KEEP = 1000
+
+
+def edit(note, versions):
+    """Правит заметку versions раз; возвращает тексты всех версий."""
+    texts = [note.text]
+    for number in range(versions):
+        lines = note.text.splitlines(keepends=True)
+        lines[number % len(lines)] = f'правка {number}\n'
+        if number % 3 == 0:
+            lines.append(f'новая строка {number}\n')
+        note.text = ''.join(lines)
+        note.save()
+        texts.append(note.text)
+    return texts
+
+
+@pytest.mark.parametrize(
+    'old, new',
+    (
+        ('', 'a\nb'),
+        ('a\nb\nc\n', 'a\nc\nd'),
+        ('одна строка', ''),
+        ('a\nb\n', 'a\nb\n'),
+    ),
+)
+def test_patch_restores_diff(old, new):
+    assert revisions.patch(old, revisions.diff(old, new)) == new
+
+
+def test_every_version_rebuilt(note, django_assert_num_queries):
+    texts = edit(note, 23)
+    assert NoteRevision.objects.filter(note=note).count() == 24
+    assert NoteRevision.objects.filter(
+        note=note, snapshot__isnull=False
+    ).count() == 5
+    for number, text in enumerate(texts, start=1):
+        with django_assert_num_queries(1):
+            assert revisions.rebuild(note.pk, number) == (note.title, text)
+
+
+def test_unchanged_save_skips_revision(note):
+    note.save()
+    assert NoteRevision.objects.filter(note=note).count() == 1
+
+
+def test_prune_keeps_latest_versions(note, settings):
+    settings.NOTES_REVISIONS_KEEP = 7
+    texts = edit(note, 20)
+    numbers = list(
+        NoteRevision.objects.filter(note=note)
+        .order_by('number').values_list('number', flat=True)
+    )
+    assert numbers == list(range(15, 22))
+    assert NoteRevision.objects.get(note=note, number=15).is_snapshot
+    for number in numbers:
+        assert revisions.rebuild(note.pk, number)[1] == texts[number - 1]
+    with pytest.raises(NoteRevision.DoesNotExist):
+        revisions.rebuild(note.pk, 14)
+
+
+def test_api_revisions(note, author_client):
+    texts = edit(note, 3)
+    url = reverse('notes:api_revisions', args=(note.slug,))
+    response = author_client.get(url)
+    assert [row['number'] for row in response.json()['results']] == [
+        4, 3, 2, 1
+    ]
+    url = reverse('notes:api_revision', args=(note.slug, 2))
+    assert author_client.get(url).json()['text'] == texts[1]
+    url = reverse('notes:api_revision', args=(note.slug, 10))
+    assert author_client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_revisions_of_another_user(note, admin_client):
+    url = reverse('notes:api_revisions', args=(note.slug,))
+    assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND
@@ -1,6 +1,8 @@
+import logging
 from http import HTTPStatus
 
 import pytest
+from django.core.handlers.asgi import ASGIHandler
 from django.shortcuts import reverse
 from pytest_django.asserts import assertRedirects
 
@@ -63,3 +65,56 @@ def test_redirects(client, name, args):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('notes:async_list', None),
+        ('notes:async_detail', pytest.lazy_fixture('slug_for_args')),
+        ('notes:api_async_list', None),
+    ),
+)
+def test_async_pages_availability_for_author(author_client,
+                                             async_author_client, name, args):
+    url = reverse(name, args=args)
+    for client in (author_client, async_author_client):
+        assert client.get(url).status_code == HTTPStatus.OK
+
+
+def test_async_detail_not_found_for_other_user(admin_client,
+                                               async_admin_client,
+                                               slug_for_args):
+    url = reverse('notes:async_detail', args=slug_for_args)
+    for client in (admin_client, async_admin_client):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_pages_for_anonymous(client, async_anonymous_client):
+    url = reverse('notes:async_list')
+    login_url = reverse('users:login')
+    for anonymous in (client, async_anonymous_client):
+        response = anonymous.get(url)
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.url == f'{login_url}?next={url}'
+        response = anonymous.get(reverse('notes:api_async_list'))
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    'middleware',
+    (
+        'notes.instrumentation.QueryBudgetMiddleware',
+        'notes.ratelimit.RateLimitMiddleware',
+        'notes.routers.ReadReplicaMiddleware',
+    ),
+)
+def test_middleware_not_adapted_under_asgi(settings, caplog, middleware):
+    """
+    Синхронный middleware под ASGI Django оборачивает в sync_to_async
+    с общим потоком, и запросы выполняются по одному.
+    """
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        ASGIHandler()
+    assert f'middleware {middleware} adapted' not in caplog.text
@@ -0,0 +1,107 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.shortcuts import reverse
+
+from notes import search
+from notes.models import Note
+
+
+@pytest.fixture(params=('fts5', 'postings'))
+def search_backend(request, settings):
+    settings.NOTES_SEARCH_BACKEND = request.param
+    return request.param
+
+
+@pytest.fixture
+def notes_for_search(search_backend, author, admin_user):
+    return {
+        'cats': Note.objects.create(
+            title='Кошки', text='Ёжики и кошки живут дружно',
+            slug='cats', author=author,
+        ),
+        'dogs': Note.objects.create(
+            title='Собаки', text='Про кошек ни слова, только собаки',
+            slug='dogs', author=author,
+        ),
+        'alien': Note.objects.create(
+            title='Кошки', text='Чужие кошки',
+            slug='alien', author=admin_user,
+        ),
+    }
+
+
+def test_tokenize_handles_cyrillic():
+    assert search.tokenize('Ёжик, ЙОД и snake_case-42') == [
+        'ежик', 'йод', 'и', 'snake', 'case', '42'
+    ]
+
+
+def test_search_ranks_and_scopes_by_author(notes_for_search, author):
+    found = search.search_ids(author, 'кошки')
+    assert found == [notes_for_search['cats'].pk]
+
+
+def test_author_id_is_not_a_search_word(notes_for_search, author):
+    assert search.search_ids(author, str(author.pk)) == []
+    assert search.search_ids(None, str(author.pk)) == []
+
+
+def test_search_requires_all_words(notes_for_search, author):
+    assert search.search_ids(author, 'ежики собаки') == []
+    assert search.search_ids(author, 'ежики дружно') == [
+        notes_for_search['cats'].pk
+    ]
+
+
+def test_index_follows_updates_and_deletes(notes_for_search, author):
+    note = notes_for_search['dogs']
+    note.text = 'Теперь про кошки'
+    note.save()
+    assert set(search.search_ids(author, 'кошки')) == {
+        notes_for_search['cats'].pk, note.pk
+    }
+    note.delete()
+    assert search.search_ids(author, 'кошки') == [
+        notes_for_search['cats'].pk
+    ]
+
+
+def test_search_page(notes_for_search, author_client):
+    url = reverse('notes:search')
+    response = author_client.get(url, {'q': 'Кошки'})
+    assert list(response.context['object_list']) == [
+        notes_for_search['cats']
+    ]
+
+
+def test_migrations_index_existing_notes(tmp_path, django_db_blocker):
+    alias = 'search_migrations'
+    connections.databases[alias] = {
+        **connections['default'].settings_dict,
+        'NAME': str(tmp_path / 'db.sqlite3'),
+    }
+    try:
+        with django_db_blocker.unblock():
+            call_command('migrate', 'auth', database=alias, verbosity=0)
+            call_command('migrate', 'notes', '0010', database=alias,
+                         verbosity=0)
+            # Без сигналов: модели уже на схеме новее этой базы.
+            get_user_model().objects.using(alias).bulk_create(
+                [get_user_model()(username='Автор')]
+            )
+            author = get_user_model().objects.using(alias).get()
+            Note.objects.using(alias).bulk_create([
+                Note(title='Кошки', text='Ёжики', slug='cats', author=author)
+            ])
+            call_command('migrate', database=alias, verbosity=0)
+            note = Note.objects.using(alias).get()
+            assert search.uses_fts5(alias)
+            assert search.search_ids(author, 'ежики', using=alias) == [
+                note.pk
+            ]
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+from django.db import connections
+
+from yanote.db.sqlite3.base import DatabaseWrapper
+
+
+@pytest.fixture
+def file_db(tmp_path, django_db_blocker):
+    """Фабрика соединений с файловой базой во временном каталоге."""
+    settings_dict = {
+        **connections['default'].settings_dict,
+        'NAME': str(tmp_path / 'db.sqlite3'),
+    }
+    opened = []
+
+    def connect():
+        connection = DatabaseWrapper(settings_dict, alias='file_db')
+        opened.append(connection)
+        return connection
+
+    with django_db_blocker.unblock():
+        yield connect
+        for connection in opened:
+            connection.inc_thread_sharing()
+            connection.close()
+
+
+def fetch(connection, sql):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+
+def test_pragmas_applied_on_connect(file_db):
+    connection = file_db()
+    assert fetch(connection, 'PRAGMA journal_mode') == [('wal',)]
+    assert fetch(connection, 'PRAGMA synchronous') == [(1,)]
+    assert fetch(connection, 'PRAGMA busy_timeout') == [(5000,)]
+
+
+def test_writers_queue_and_readers_do_not_block(file_db):
+    writer = file_db()
+    fetch(writer, 'CREATE TABLE item (name TEXT)')
+    writer._start_transaction_under_autocommit()
+    fetch(writer, "INSERT INTO item VALUES ('first')")
+
+    errors = []
+
+    def second_writer():
+        try:
+            connection = file_db()
+            connection._start_transaction_under_autocommit()
+            fetch(connection, "INSERT INTO item VALUES ('second')")
+            connection.commit()
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=second_writer)
+    thread.start()
+    thread.join(0.3)
+    assert thread.is_alive(), 'Второй писатель должен ждать первого.'
+    # WAL: читатель видит последнее зафиксированное состояние и не ждёт.
+    assert fetch(file_db(), 'SELECT COUNT(*) FROM item') == [(0,)]
+    writer.commit()
+    thread.join(5)
+    assert not errors
+    assert fetch(writer, 'SELECT name FROM item ORDER BY rowid') == [
+        ('first',), ('second',)
+    ]
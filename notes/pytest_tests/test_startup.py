@@ -0,0 +1,57 @@
+import json
+import statistics
+
+import pytest
+from django.core.management import call_command
+from django.shortcuts import reverse
+
+from notes import startup
+
+API_SETTINGS = 'yanote.settings_api'
+# Холодный старт воркера API до готовности к первому запросу. На машине
+# разработчика он около 0,35 с; запас — на медленные CI.
+STARTUP_BUDGET_MS = 1000
+# Модули, которые воркеру API не нужны.
+NOT_LOADED = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'notes.views',
+    'notes.forms',
+    'pytils',
+)
+
+
+def test_api_worker_cold_start():
+    profiles = [
+        startup.profile(API_SETTINGS, importtime=False) for _ in range(3)
+    ]
+    modules = set(profiles[0]['modules'])
+    assert not [
+        name for name in modules
+        if name.startswith(NOT_LOADED)
+    ]
+    total_ms = statistics.median(profile['total_ms'] for profile in profiles)
+    assert total_ms < STARTUP_BUDGET_MS, profiles[0]['timeline']
+
+
+@pytest.mark.django_db
+def test_api_worker_urls(settings, author_client, note):
+    settings.ROOT_URLCONF = 'yanote.urls_api'
+    response = author_client.get(reverse('notes:api_list'))
+    assert [row['slug'] for row in response.json()['results']] == [
+        note.slug
+    ]
+
+
+def test_profile_startup_command(capsys):
+    call_command(
+        'profile_startup', settings_module=API_SETTINGS, repeat=1, top=5,
+        json=True,
+    )
+    result = json.loads(capsys.readouterr().out)
+    steps = [step for step, _ in result['timeline']]
+    assert steps[:3] == ['import django', 'settings', 'app configs']
+    assert steps[-2:] == ['urlconf', 'middleware']
+    assert 'ready notes' in steps
+    assert len(result['slowest_imports']) == 5
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+
+from notes.models import Note, UserNoteStats
+
+pytestmark = pytest.mark.django_db
+
+
+def stats_of(user):
+    row = UserNoteStats.objects.get(user=user)
+    return row.note_count, row.text_length
+
+
+def test_stats_follow_note_changes(author, note):
+    assert stats_of(author) == (1, len(note.text))
+    note.text = 'Другой, более длинный текст'
+    note.save()
+    assert stats_of(author) == (1, len(note.text))
+    other = Note.objects.create(title='x', text='xyz', author=author)
+    assert stats_of(author) == (2, len(note.text) + 3)
+    Note.objects.get(pk=note.pk).delete()
+    assert stats_of(author) == (1, 3)
+    other.title = 'Без правки текста'
+    other.save(update_fields=('title',))
+    assert stats_of(author) == (1, 3)
+
+
+def test_edit_is_single_increment(note):
+    note = Note.objects.get(pk=note.pk)
+    note.text = 'Новый текст'
+    with CaptureQueriesContext(connection) as context:
+        note.save()
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if 'notes_usernotestats' in query['sql']
+    ]
+    assert len(queries) == 1
+    assert queries[0].startswith('UPDATE')
+
+
+def test_bulk_changes_recomputed(author, note, author_client):
+    payload = {
+        'create': [{'title': 'Новая', 'text': 'a' * 10}],
+        'update': [{'slug': note.slug, 'text': 'b' * 5}],
+    }
+    author_client.post(
+        reverse('notes:api_batch'),
+        data=json.dumps(payload),
+        content_type='application/json',
+    )
+    assert stats_of(author) == (2, 15)
+
+
+def test_user_deleted_with_notes(author, note):
+    author.delete()
+    assert not UserNoteStats.objects.exists()
+
+
+def test_recompute_command_fixes_drift(author, note, admin_user):
+    UserNoteStats.objects.filter(user=author).update(
+        note_count=10, text_length=0
+    )
+    Note.objects.filter(pk=note.pk).update(text_length=1)
+    UserNoteStats.objects.filter(user=admin_user).delete()
+    call_command('recompute_note_stats', lengths=True, chunk_size=1)
+    assert stats_of(author) == (1, len(note.text))
+    assert stats_of(admin_user) == (0, 0)
+
+
+def test_header_shows_note_count(author, author_client, note):
+    url = reverse('notes:home')
+    assert 'заметок: 1' in author_client.get(url).content.decode()
+    Note.objects.create(title='x', text='x', author=author)
+    assert 'заметок: 2' in author_client.get(url).content.decode()
@@ -0,0 +1,125 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+
+from notes import tags
+from notes.models import Folder, Note, Tag
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tagged_notes(author):
+    """Заметки с метками: a — работа и идеи, b — работа, c — идеи."""
+    work, ideas = tags.get_tags(author.pk, ['работа', 'идеи'])
+    folder = Folder.objects.create(author=author, name='Проекты')
+    notes = {}
+    for slug, note_tags in (('a', (work, ideas)), ('b', (work,)),
+                            ('c', (ideas,))):
+        notes[slug] = Note.objects.create(
+            title=slug, text=slug, slug=slug, author=author,
+            folder=folder if slug != 'c' else None,
+        )
+        notes[slug].tags.set(note_tags)
+    return notes
+
+
+def tag_counts(author):
+    return dict(
+        Tag.objects.filter(author=author).values_list('name', 'note_count')
+    )
+
+
+def test_parse_names():
+    assert tags.parse_names(' Работа,идеи;  работа\nсписок  дел,, ') == [
+        'работа', 'идеи', 'список дел'
+    ]
+
+
+def test_form_saves_folder_and_tags(author_client, author, form_data):
+    form_data.update(folder='Дом', tags='Покупки, ремонт')
+    author_client.post(reverse('notes:add'), data=form_data)
+    note = Note.objects.get(slug=form_data['slug'])
+    assert note.folder.name == 'Дом'
+    assert tag_counts(author) == {'покупки': 1, 'ремонт': 1}
+
+    url = reverse('notes:edit', args=(note.slug,))
+    assert author_client.get(url).context['form']['tags'].value() == (
+        'покупки, ремонт'
+    )
+    form_data.update(folder='', tags='ремонт, дача')
+    author_client.post(url, data=form_data)
+    note.refresh_from_db()
+    assert note.folder is None
+    assert tag_counts(author) == {'покупки': 0, 'ремонт': 1, 'дача': 1}
+
+
+def test_edit_does_not_load_author(shared_cache, author_client, note,
+                                   form_data):
+    """
+    Папка и метки подбираются по author_id заметки; сам пользователь
+    запроса берётся из общего кеша.
+    """
+    form_data.update(folder='Дом', tags='ремонт', version=note.version)
+    url = reverse('notes:edit', args=(note.slug,))
+    author_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        author_client.post(url, data=form_data)
+    assert Note.objects.get(pk=note.pk).folder.name == 'Дом'
+    assert not [
+        query for query in queries if 'FROM "auth_user"' in query['sql']
+    ]
+
+
+def test_counts_follow_changes(tagged_notes, author):
+    assert tag_counts(author) == {'работа': 2, 'идеи': 2}
+    tagged_notes['a'].tags.remove(*Tag.objects.filter(name='работа'))
+    assert tag_counts(author) == {'работа': 1, 'идеи': 2}
+    tagged_notes['c'].tags.clear()
+    assert tag_counts(author) == {'работа': 1, 'идеи': 1}
+    Tag.objects.get(name='работа').notes.add(tagged_notes['c'])
+    assert tag_counts(author) == {'работа': 2, 'идеи': 1}
+    tagged_notes['b'].delete()
+    assert tag_counts(author) == {'работа': 1, 'идеи': 1}
+
+
+@pytest.mark.parametrize(
+    'query, expected',
+    (
+        ('tag=работа', ['a', 'b']),
+        ('tag=работа&tag=идеи', ['a']),
+        ('tag=работа&tag=идеи&match=any', ['a', 'b', 'c']),
+        ('tag=идеи&folder=Проекты', ['a']),
+        ('folder=Проекты', ['a', 'b']),
+        ('tag=работа&tag=нет', []),
+        ('tag=нет&match=any', []),
+    ),
+)
+def test_list_filters(tagged_notes, author_client, query, expected):
+    response = author_client.get(reverse('notes:list') + '?' + query)
+    slugs = [note.slug for note in response.context['object_list']]
+    assert slugs == expected
+
+
+def test_filtered_list_fits_query_budget(tagged_notes, author, author_client,
+                                         query_budget):
+    for index in range(20):
+        note = Note.objects.create(
+            title='x', text='x', slug=f'x{index}', author=author
+        )
+        note.tags.set(Tag.objects.all())
+    url = reverse('notes:list') + '?tag=работа&tag=идеи'
+    with query_budget(settings.NOTES_QUERY_BUDGETS['notes:list']):
+        response = author_client.get(url)
+    assert len(response.context['object_list']) == 21
+    assert '#идеи' in response.content.decode()
+
+
+def test_next_page_keeps_filters(tagged_notes, author_client, monkeypatch):
+    monkeypatch.setattr('notes.views.NotesList.page_size', 1)
+    response = author_client.get(reverse('notes:list') + '?tag=работа')
+    assert '?tag=%D1%80%D0%B0%D0%B1%D0%BE%D1%82%D0%B0&after=' in (
+        response.content.decode()
+    )
@@ -0,0 +1,79 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from notes import search, tasks
+from notes.models import Note, NoteRevision, NoteTask
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def queued(settings):
+    settings.NOTES_TASKS_EAGER = False
+    settings.NOTES_TASK_MAX_ATTEMPTS = 3
+    settings.NOTES_TASK_RETRY_DELAY = 10
+
+
+def work():
+    # Тестовая транзакция держит соединение: выполняем задачи в нём же.
+    call_command('run_note_worker', workers=0, once=True)
+
+
+def test_side_effects_run_in_worker(queued, author):
+    note = Note.objects.create(
+        title='Кошки', text='Про кошек', slug='cats', author=author
+    )
+    note.text = 'Про кошек и собак'
+    note.save()
+    # Индекс и история — одна задача на каждое сохранение.
+    assert NoteTask.objects.count() == 2
+    assert search.search_ids(author, 'кошки') == []
+    assert not NoteRevision.objects.exists()
+    work()
+    assert not NoteTask.objects.exists()
+    assert search.search_ids(author, 'собак') == [note.pk]
+    # Обе правки до запуска воркера слились в одну версию.
+    assert NoteRevision.objects.filter(note=note).count() == 1
+
+
+def test_failed_task_retried_with_backoff(queued, monkeypatch):
+    def broken(note_ids, using):
+        raise RuntimeError('нет связи')
+
+    monkeypatch.setitem(tasks.HANDLERS, 'index_notes', broken)
+    task = tasks.enqueue('index_notes', note_ids=[1])
+    delays = []
+    for _ in range(3):
+        NoteTask.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        started = timezone.now()
+        work()
+        task.refresh_from_db()
+        delays.append(task.run_at - started)
+    assert task.attempts == 3
+    assert task.last_error == 'RuntimeError: нет связи'
+    assert task.failed_at is not None
+    assert delays[1] >= delays[0] + timedelta(seconds=9)
+    assert tasks.claim(10) == []
+
+
+def test_claimed_task_not_claimed_again(queued):
+    task = tasks.enqueue('index_notes', note_ids=[1])
+    assert tasks.claim(10) == [task.pk]
+    assert tasks.claim(10) == []
+
+
+def test_queue_stats(queued, capsys):
+    tasks.enqueue('index_notes', note_ids=[1])
+    tasks.enqueue('index_notes', note_ids=[2])
+    NoteTask.objects.create(
+        name='index_notes', payload={}, failed_at=timezone.now()
+    )
+    call_command('run_note_worker', stats=True)
+    stats = json.loads(capsys.readouterr().out)
+    assert stats['pending'] == stats['due'] == 2
+    assert stats['failed'] == 1
+    assert stats['running'] == 0
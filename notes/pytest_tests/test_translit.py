@@ -0,0 +1,45 @@
+import random
+
+import pytest
+from pytils.translit import ALPHABET, slugify as pytils_slugify
+
+from notes import slugs
+from notes.translit import slugify, slugify_many
+
+CORPUS = (
+    'Заголовок',
+    'Съешь же ещё этих мягких французских булок',
+    'ЁЛКА и Щука',
+    '«Кавычки» — тире – и… многоточие',
+    '№ 5 & ещё &amp; ещё',
+    'Mixed Case Title 2024',
+    '  пробелы   по краям  ',
+    'дефисы---и__подчёркивания',
+    'Україна: ґ, є, ї',
+    'emoji 🙂 и 中文',
+    '',
+)
+
+
+@pytest.mark.parametrize('text', CORPUS)
+def test_slugify_matches_pytils(text):
+    assert slugify(text) == pytils_slugify(text)
+
+
+def test_slugify_matches_pytils_on_random_strings():
+    rng = random.Random(11)
+    symbols = list(ALPHABET) + list(' -_&;.,!?«»—…№\t\nÆß中🙂')
+    for _ in range(2000):
+        text = ''.join(rng.choices(symbols, k=rng.randint(0, 40)))
+        assert slugify(text) == pytils_slugify(text), text
+
+
+def test_slugify_many():
+    texts = list(CORPUS) * 2
+    assert slugify_many(texts) == [pytils_slugify(text) for text in texts]
+
+
+def test_slugs_from_titles():
+    assert slugs.slugs_from_titles(['Заголовок', '…', 'а' * 10], 5) == [
+        'zagol', slugs.DEFAULT_SLUG, 'aaaaa'
+    ]
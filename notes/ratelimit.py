@@ -0,0 +1,171 @@
+"""
+Ограничение частоты изменяющих запросов (token bucket).
+
+NOTES_RATE_LIMITS задаёт лимит по имени URL, например
+{'notes:add': '30/m'}: корзина на 30 запросов, которая пополняется
+со скоростью 30 в минуту. Лимит действует на небезопасные методы (POST и
+т. п.); ключ — id вошедшего пользователя, а для анонима — IP клиента.
+Cookie сессии ключом не служит: случайная cookie на каждый запрос давала
+бы новую корзину, а регистрация открыта и без входа.
+
+Проверка делается в __call__ до представления, имя URL middleware
+находит сам. Пользователь к этому моменту определён
+CachedAuthenticationMiddleware и обычно берётся из кеша, без обращений
+к БД. Под ASGI в поток sync_to_async уходит только сама проверка лимита,
+а не весь запрос.
+
+MemoryBackend хранит корзины в процессе, CacheBackend — в общем кеше
+NOTES_RATE_LIMIT_CACHE, чтобы лимит был общим для всех процессов.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.urls import Resolver404, get_resolver
+from django.utils.module_loading import import_string
+
+from .routers import SAFE_METHODS
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60): ёмкость корзины и период в секундах."""
+    try:
+        count, period = rate.split('/')
+        return int(count), PERIODS[period]
+    except (KeyError, ValueError):
+        raise ImproperlyConfigured(f'Неверный лимит {rate!r}.')
+
+
+def take(state, capacity, period, now):
+    """
+    Забирает токен из корзины state = (токены, время) или None.
+
+    Возвращает новое состояние и сколько секунд ждать до следующего
+    токена; 0 — запрос разрешён.
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens, updated = state
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class MemoryBackend:
+    """Корзины в памяти процесса; самые старые вытесняются."""
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, capacity, period, now):
+        with self._lock:
+            state, wait = take(
+                self._buckets.pop(key, None), capacity, period, now
+            )
+            self._buckets[key] = state
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class CacheBackend:
+    """
+    Корзины в кеше Django, общие для процессов.
+
+    Чтение и запись не атомарны: при гонке параллельных запросов одного
+    клиента лимит может быть превышен на несколько запросов.
+    """
+
+    def hit(self, key, capacity, period, now):
+        cache = caches[settings.NOTES_RATE_LIMIT_CACHE]
+        key = f'notes:ratelimit:{key}'
+        state, wait = take(cache.get(key), capacity, period, now)
+        cache.set(key, state, timeout=math.ceil(period))
+        return wait
+
+
+def client_key(request):
+    """Вошедший пользователь — по id, аноним — по IP."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+class RateLimitMiddleware:
+    """Отвечает 429 на изменяющие запросы сверх NOTES_RATE_LIMITS."""
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.backend = import_string(settings.NOTES_RATE_LIMIT_BACKEND)()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        limit = self.limit(request)
+        if limit is not None:
+            response = self.check(request, *limit)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        limit = self.limit(request)
+        if limit is not None:
+            # Пользователь может потребовать запроса к БД, а корзины
+            # CacheBackend — обращения к кешу: оба только синхронные.
+            response = await sync_to_async(
+                self.check, thread_sensitive=True
+            )(request, *limit)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    @staticmethod
+    def limit(request):
+        """(имя URL, лимит) для изменяющего запроса или None."""
+        if request.method in SAFE_METHODS or request.method == 'OPTIONS':
+            return None
+        resolver = get_resolver(getattr(request, 'urlconf', None))
+        try:
+            view_name = resolver.resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+        rate = settings.NOTES_RATE_LIMITS.get(view_name)
+        if rate is None:
+            return None
+        return view_name, rate
+
+    def check(self, request, view_name, rate):
+        """Ответ 429, если корзина клиента пуста, иначе None."""
+        capacity, period = parse_rate(rate)
+        wait = self.backend.hit(
+            f'{view_name}:{client_key(request)}', capacity, period,
+            time.time(),
+        )
+        if not wait:
+            return None
+        response = HttpResponse(
+            'Слишком много запросов, повторите позже.',
+            status=429,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
@@ -0,0 +1,171 @@
+"""
+История правок заметок: периодические снимки и построчные изменения.
+
+Версия n хранит либо полный текст (снимок), либо изменения относительно
+версии n - 1. Снимок пишется для первой версии и затем каждые
+NOTES_REVISION_SNAPSHOT_INTERVAL версий, поэтому любая версия
+восстанавливается одним запросом не более чем по стольким строкам.
+
+Изменения — JSON-список [start, end, lines]: строки start:end прежнего
+текста заменяются на lines. Применяются с конца, чтобы индексы не
+сдвигались.
+
+Хранятся последние NOTES_REVISIONS_KEEP версий: при записи очередного
+снимка более старые удаляются, а первая оставшаяся становится снимком.
+"""
+import json
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import NoteRevision
+
+RECORD_ATTEMPTS = 3
+BATCH_SIZE = 500
+
+
+def diff(old, new):
+    """Построчные изменения, превращающие old в new."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return json.dumps(
+        [
+            [start, end, new_lines[new_start:new_end]]
+            for tag, start, end, new_start, new_end in matcher.get_opcodes()
+            if tag != 'equal'
+        ],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+
+
+def patch(text, delta):
+    lines = text.splitlines(keepends=True)
+    for start, end, new_lines in reversed(json.loads(delta)):
+        lines[start:end] = new_lines
+    return ''.join(lines)
+
+
+def _revisions(note_id, using):
+    return NoteRevision.objects.using(using).filter(note_id=note_id)
+
+
+def _window(note_id, number=None, using=None):
+    """Версии от ближайшего снимка до number (или до последней)."""
+    queryset = _revisions(note_id, using)
+    if number is not None:
+        queryset = queryset.filter(number__lte=number)
+    interval = settings.NOTES_REVISION_SNAPSHOT_INTERVAL
+    return list(queryset.order_by('-number')[:interval])[::-1]
+
+
+def _apply(window):
+    """(title, text) последней версии окна."""
+    base = max(
+        index for index, revision in enumerate(window)
+        if revision.is_snapshot
+    )
+    text = window[base].snapshot
+    for revision in window[base + 1:]:
+        text = patch(text, revision.delta)
+    return window[-1].title, text
+
+
+def rebuild(note_id, number, using=None):
+    """Заголовок и текст заметки в версии number."""
+    window = _window(note_id, number, using)
+    if not window or window[-1].number != number:
+        raise NoteRevision.DoesNotExist(
+            f'Версии {number} заметки {note_id} нет.'
+        )
+    return _apply(window)
+
+
+def record(note, using=None, created=False):
+    """
+    Сохраняет текущее состояние заметки новой версией.
+
+    Если заголовок и текст не изменились с прошлой версии, ничего не
+    пишет и возвращает None. Для только что созданной заметки (created)
+    историю можно не читать.
+    """
+    interval = settings.NOTES_REVISION_SNAPSHOT_INTERVAL
+    for attempt in range(RECORD_ATTEMPTS):
+        window = [] if created else _window(note.pk, using=using)
+        revision = NoteRevision(note_id=note.pk, title=note.title)
+        if not window:
+            revision.number = 1
+        else:
+            title, text = _apply(window)
+            if (title, text) == (note.title, note.text):
+                return None
+            revision.number = window[-1].number + 1
+        if (revision.number - 1) % interval == 0:
+            revision.snapshot = note.text
+        else:
+            revision.delta = diff(text, note.text)
+        try:
+            with transaction.atomic(using=using):
+                revision.save(using=using)
+        except IntegrityError:
+            # Номер заняла параллельная правка: строим изменения заново.
+            if attempt == RECORD_ATTEMPTS - 1:
+                raise
+            created = False
+            continue
+        if revision.is_snapshot and revision.number > 1:
+            prune(note.pk, using=using)
+        return revision
+
+
+def record_many(notes, using=None):
+    """
+    record для пачки заметок.
+
+    Первые версии заметок без истории (импорт, пакетное создание)
+    пишутся одним bulk_create, остальные — по одной.
+    """
+    notes = list(notes)
+    with_history = set(
+        NoteRevision.objects.using(using)
+        .filter(note_id__in=[note.pk for note in notes])
+        .values_list('note_id', flat=True)
+        .distinct()
+    )
+    NoteRevision.objects.using(using).bulk_create(
+        (
+            NoteRevision(
+                note_id=note.pk, number=1, title=note.title,
+                snapshot=note.text,
+            )
+            for note in notes
+            if note.pk not in with_history
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    for note in notes:
+        if note.pk in with_history:
+            record(note, using=using)
+
+
+def prune(note_id, keep=None, using=None):
+    """Оставляет последние keep версий; возвращает число удалённых."""
+    keep = keep or settings.NOTES_REVISIONS_KEEP
+    queryset = _revisions(note_id, using)
+    latest = queryset.order_by('-number').values_list(
+        'number', flat=True
+    ).first()
+    if latest is None or latest <= keep:
+        return 0
+    first_kept = latest - keep + 1
+    revision = queryset.filter(number=first_kept).first()
+    if revision is not None and not revision.is_snapshot:
+        revision.title, revision.snapshot = rebuild(
+            note_id, first_kept, using=using
+        )
+        revision.delta = ''
+        revision.save(update_fields=('snapshot', 'delta'), using=using)
+    deleted, _ = queryset.filter(number__lt=first_kept).delete()
+    return deleted
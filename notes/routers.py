@@ -0,0 +1,143 @@
+"""
+Чтение заметок с реплик базы данных.
+
+Представления с атрибутом read_replica = True на GET и HEAD читают
+модели notes с одной из реплик NOTES_READ_REPLICAS. Всё остальное, в том
+числе сессии и пользователи, идёт в основную базу: вход не должен
+зависеть от отставания реплики.
+
+После любого небезопасного запроса (POST, PUT, DELETE...) клиент получает
+cookie, и NOTES_PRIMARY_PIN_SECONDS секунд его чтения тоже идут в основную
+базу, чтобы после создания заметки и редиректа она была видна сразу.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import Resolver404, get_resolver
+
+PIN_COOKIE = 'notes_primary_until'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_replica_reads = ContextVar('notes_replica_reads', default=False)
+
+
+def read_replicas():
+    return getattr(settings, 'NOTES_READ_REPLICAS', [])
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Включает или выключает чтение с реплик внутри блока."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def uses_replica(db):
+    return db != DEFAULT_DB_ALIAS and db in read_replicas()
+
+
+class ReadReplicaRouter:
+    """Направляет чтение моделей notes на реплику, если это разрешено."""
+
+    app_label = 'notes'
+
+    def db_for_read(self, model, **hints):
+        replicas = read_replicas()
+        if (
+            replicas
+            and _replica_reads.get()
+            and model._meta.app_label == self.app_label
+        ):
+            return random.choice(replicas)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики хранят те же данные, что и основная база."""
+        databases = {DEFAULT_DB_ALIAS, *read_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReadReplicaMiddleware:
+    """
+    Включает чтение с реплик для представлений только для чтения.
+
+    Флаг ставится и снимается в __call__, вокруг всей обработки запроса
+    вместе с отрисовкой шаблона. Под ASGI process_view и __call__
+    выполняются в разных контекстах, поэтому снять там флаг,
+    поставленный в process_view, нельзя. Представление для этого
+    находится заранее; без реплик проверка не делается вовсе.
+
+    Работает и синхронно, и асинхронно: под ASGI синхронный middleware
+    Django оборачивает в sync_to_async(thread_sensitive=True), и все
+    запросы, включая корутины, выстраивались бы в очередь к одному потоку.
+    """
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.reads_replica(request):
+            with replica_reads():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        if self.reads_replica(request):
+            with replica_reads():
+                response = await self.get_response(request)
+        else:
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        """После записи клиент какое-то время читает из основной базы."""
+        if request.method not in SAFE_METHODS:
+            window = settings.NOTES_PRIMARY_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE,
+                str(time.time() + window),
+                max_age=window,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def reads_replica(self, request):
+        if (
+            not read_replicas()
+            or request.method not in SAFE_METHODS
+            or self.pinned(request)
+        ):
+            return False
+        resolver = get_resolver(getattr(request, 'urlconf', None))
+        try:
+            view_func = resolver.resolve(request.path_info).func
+        except Resolver404:
+            return False
+        view = getattr(view_func, 'view_class', view_func)
+        return getattr(view, 'read_replica', False)
+
+    @staticmethod
+    def pinned(request):
+        """Клиент недавно писал: читаем из основной базы."""
+        try:
+            return float(request.COOKIES[PIN_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
@@ -0,0 +1,164 @@
+"""
+Полнотекстовый поиск по заметкам пользователя.
+
+Индекс хранится либо в виртуальной таблице SQLite FTS5, либо, если FTS5
+недоступен, в переносимой таблице токенов NoteToken. В обоих случаях
+в индекс попадают токены, нормализованные функцией tokenize, поэтому
+запрос и документ всегда разбираются одинаково.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, Sum
+
+from .models import NoteToken
+
+FTS_TABLE = 'notes_note_fts'
+MAX_TOKEN_LENGTH = 64
+TITLE_WEIGHT = 3
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+_fts5_tables = {}
+
+
+def tokenize(text):
+    """Разбивает текст на токены: нижний регистр, ё приравнивается к е."""
+    tokens = TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+    return [token[:MAX_TOKEN_LENGTH] for token in tokens]
+
+
+def forget_tables():
+    """
+    Забывает, в каких базах есть таблица FTS5.
+
+    Таблицу создают и удаляют миграции, после них наличие проверяется
+    заново.
+    """
+    _fts5_tables.clear()
+
+
+def uses_fts5(using=DEFAULT_DB_ALIAS):
+    """Определяет, каким индексом пользоваться на этой базе."""
+    backend = getattr(settings, 'NOTES_SEARCH_BACKEND', 'auto')
+    if backend != 'auto':
+        return backend == 'fts5'
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts5_tables:
+        tables = connection.introspection.table_names()
+        _fts5_tables[name] = FTS_TABLE in tables
+    return _fts5_tables[name]
+
+
+def index_rows(rows, using=DEFAULT_DB_ALIAS, token_model=NoteToken):
+    """
+    Индексирует записи (note_id, author_id, title, text).
+
+    Старые данные индекса по этим заметкам предварительно удаляются,
+    поэтому функция годится и для первичного построения, и для обновления.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    note_ids = [row[0] for row in rows]
+    unindex_ids(note_ids, using=using, token_model=token_model)
+    if uses_fts5(using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text, author) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (note_id, ' '.join(tokenize(title)),
+                     ' '.join(tokenize(text)), str(author_id))
+                    for note_id, author_id, title, text in rows
+                ],
+            )
+        return
+    postings = []
+    for note_id, author_id, title, text in rows:
+        weights = Counter(tokenize(text))
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        postings.extend(
+            token_model(
+                note_id=note_id, author_id=author_id,
+                token=token, weight=weight,
+            )
+            for token, weight in weights.items()
+        )
+    token_model.objects.using(using).bulk_create(postings, batch_size=500)
+
+
+def unindex_ids(note_ids, using=DEFAULT_DB_ALIAS, token_model=NoteToken):
+    """Удаляет заметки из индекса."""
+    note_ids = list(note_ids)
+    if uses_fts5(using):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(note_id,) for note_id in note_ids],
+            )
+    else:
+        token_model.objects.using(using).filter(
+            note_id__in=note_ids
+        ).delete()
+
+
+def index_note(note, using=DEFAULT_DB_ALIAS):
+    index_rows(
+        [(note.pk, note.author_id, note.title, note.text)], using=using
+    )
+
+
+def search_ids(author, query, limit=50, using=DEFAULT_DB_ALIAS):
+    """
+    Возвращает id заметок автора, содержащих все слова запроса.
+
+    Результат отсортирован по релевантности: bm25 для FTS5 и сумма весов
+    токенов (совпадение в заголовке весит больше) для таблицы токенов.
+    author=None ищет по всем заметкам (админка); в таблице токенов индекс
+    начинается с автора, поэтому без него поиск быстрый только на FTS5.
+    В FTS5 автор — индексируемая колонка: условие на неё входит в MATCH,
+    и чужие заметки отсекаются индексом, а не фильтром после поиска.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return []
+    if uses_fts5(using):
+        words = ' '.join(f'"{token}"' for token in tokens)
+        # Слова ищутся только в заголовке и тексте, не в колонке автора.
+        match = f'{{title text}} : ({words})'
+        if author is not None:
+            match = f'author : "{author.pk}" AND {match}'
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}.0, 1.0, 0.0) '
+                'LIMIT %s',
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+    postings = NoteToken.objects.using(using).filter(token__in=tokens)
+    if author is not None:
+        postings = postings.filter(author=author)
+    return list(
+        postings
+        .values('note_id')
+        .annotate(score=Sum('weight'), matched=Count('token'))
+        .filter(matched=len(tokens))
+        .order_by('-score', 'note_id')
+        .values_list('note_id', flat=True)[:limit]
+    )
+
+
+def search(queryset, author, query, limit=50):
+    """Возвращает заметки из queryset в порядке релевантности."""
+    ids = search_ids(author, query, limit=limit, using=queryset.db)
+    notes = queryset.in_bulk(ids)
+    return [notes[note_id] for note_id in ids if note_id in notes]
@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete,
+)
+from django.dispatch import Signal, receiver
+
+from . import auth, search, stats, tags, tasks
+from .models import Note, NoteTag, UserNoteStats
+
+INDEXED_FIELDS = {'title', 'text', 'author'}
+REVISION_FIELDS = {'title', 'text'}
+
+# Отправляется после массовых операций, которые обходят post_save и
+# post_delete (bulk_create, bulk_update, QuerySet.update). Аргументы:
+# note_ids — затронутые заметки, author_ids — их авторы, using — алиас БД.
+notes_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=Note)
+def enqueue_note_tasks(sender, instance, update_fields=None, using=None,
+                       **kwargs):
+    """
+    Ставит переиндексацию и запись версии в историю после сохранения.
+
+    Обе задачи идут одной строкой очереди; при update_fields — только
+    те, чьи поля сохранялись.
+    """
+    changed = None if update_fields is None else set(update_fields)
+    steps = [
+        step for step, fields in (
+            ('index_notes', INDEXED_FIELDS),
+            ('record_revisions', REVISION_FIELDS),
+        )
+        if changed is None or fields & changed
+    ]
+    if steps:
+        tasks.enqueue(
+            'sync_notes', using=using, note_ids=[instance.pk], steps=steps
+        )
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, using=None, **kwargs):
+    """Удалённая заметка при переиндексации уходит из индекса."""
+    tasks.enqueue('index_notes', using=using, note_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Note)
+def update_note_stats(sender, instance, created, using=None, **kwargs):
+    """Прибавляет к статистике автора новую заметку или изменение длины."""
+    if created:
+        stats.apply_delta(
+            instance.author_id, 1, instance.text_length, using=using
+        )
+    elif 'text_length' not in instance.__dict__:
+        # Текст не загружали и не сохраняли: длина не менялась.
+        return
+    elif instance.__dict__.get('_loaded_text_length') is None:
+        # Прежняя длина неизвестна (заметка собрана не из БД).
+        stats.recompute([instance.author_id], using=using)
+    else:
+        stats.apply_delta(
+            instance.author_id,
+            text_length=instance.text_length - instance._loaded_text_length,
+            using=using,
+        )
+    instance._loaded_text_length = instance.text_length
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_note_stats(sender, instance, using=None, **kwargs):
+    stats.apply_delta(
+        instance.author_id, -1, -instance.text_length, using=using
+    )
+
+
+@receiver(m2m_changed, sender=Note.tags.through)
+def update_tag_counts(sender, instance, action, reverse, pk_set, using,
+                      **kwargs):
+    """Пересчитывает note_count меток, у которых поменялись заметки."""
+    if reverse:
+        tag_ids = {instance.pk}
+    elif action == 'pre_clear':
+        instance._cleared_tag_ids = list(
+            NoteTag.objects.using(using).filter(note=instance)
+            .values_list('tag_id', flat=True)
+        )
+        return
+    elif action == 'post_clear':
+        tag_ids = instance.__dict__.pop('_cleared_tag_ids', ())
+    else:
+        tag_ids = pk_set
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        tags.recount(tag_ids, using=using)
+
+
+@receiver(pre_delete, sender=Note)
+def remember_note_tags(sender, instance, using=None, **kwargs):
+    """Связи удалятся каскадом, без m2m_changed: запоминаем метки."""
+    instance._deleted_tag_ids = list(
+        NoteTag.objects.using(using).filter(note=instance)
+        .values_list('tag_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Note)
+def update_tag_counts_after_delete(sender, instance, using=None, **kwargs):
+    tags.recount(
+        instance.__dict__.pop('_deleted_tag_ids', ()), using=using
+    )
+
+
+@receiver(notes_bulk_changed)
+def enqueue_note_tasks_in_bulk(sender, note_ids, using=None, **kwargs):
+    tasks.enqueue(
+        'sync_notes', using=using or DEFAULT_DB_ALIAS,
+        note_ids=list(note_ids), steps=['index_notes', 'record_revisions'],
+    )
+
+
+@receiver(notes_bulk_changed)
+def recompute_note_stats_in_bulk(sender, author_ids, using=None, **kwargs):
+    stats.recompute(set(author_ids), using=using or DEFAULT_DB_ALIAS)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, using=None, **kwargs):
+    """Смена пароля, last_login и прочие правки сбрасывают кеш."""
+    user_id = instance.pk
+    auth.invalidate_user(user_id)
+    transaction.on_commit(lambda: auth.invalidate_user(user_id), using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_note_stats(sender, instance, created, using=None, **kwargs):
+    """Строка статистики заводится сразу, дальше её только правят через F()."""
+    if created:
+        UserNoteStats.objects.using(using).get_or_create(user_id=instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        auth.invalidate_user(user.pk)
+
+
+@receiver(post_migrate)
+def forget_search_tables(sender, **kwargs):
+    search.forget_tables()
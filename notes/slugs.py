@@ -0,0 +1,120 @@
+"""
+Выдача уникальных slug для заметок.
+
+Занятость slug проверяется одним запросом по уникальному индексу: точное
+совпадение с базовым slug плюс диапазон ``base-`` … ``base.``, в который
+попадают все варианты с числовым суффиксом. Окончательно уникальность
+гарантирует ограничение в БД, поэтому при гонке запись повторяется
+с новым суффиксом.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from .translit import slugify, slugify_many
+
+# Хвост сообщения о занятом slug в формах и API.
+WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+
+DEFAULT_SLUG = 'note'
+# Столько символов оставляем под суффикс вида -123456.
+SUFFIX_RESERVE = 7
+# Сколько базовых slug проверяется одним запросом при пакетной выдаче.
+BATCH_SIZE = 200
+
+
+def slug_from_title(title, max_length):
+    """Транслитерирует заголовок в slug нужной длины."""
+    return slugify(title)[:max_length] or DEFAULT_SLUG
+
+
+def slugs_from_titles(titles, max_length):
+    """То же для пачки заголовков за один проход."""
+    return [
+        slug[:max_length] or DEFAULT_SLUG for slug in slugify_many(titles)
+    ]
+
+
+def _stem(base, max_length):
+    return base[:max_length - SUFFIX_RESERVE]
+
+
+def _taken_q(base, max_length):
+    stem = _stem(base, max_length)
+    return Q(slug=base) | Q(slug__gt=f'{stem}-', slug__lt=f'{stem}.')
+
+
+def _pick(bases, taken, existing, max_length):
+    """Назначает slug, продолжая наибольший занятый суффикс каждого stem."""
+    suffixes = {}
+    for slug in existing:
+        match = re.fullmatch(r'(.+)-(\d+)', slug)
+        if match:
+            stem, number = match.group(1), int(match.group(2))
+            suffixes[stem] = max(suffixes.get(stem, 1), number)
+    result = []
+    used = set()
+    for base in bases:
+        if base not in taken and base not in used:
+            used.add(base)
+            result.append(base)
+            continue
+        stem = _stem(base, max_length)
+        slug = base
+        while slug in taken or slug in used:
+            suffixes[stem] = suffixes.get(stem, 1) + 1
+            slug = f'{stem}-{suffixes[stem]}'
+        used.add(slug)
+        result.append(slug)
+    return result
+
+
+def allocate(queryset, base, max_length):
+    """
+    Возвращает свободный slug: сам base или base-N.
+
+    Выполняет ровно один запрос к queryset.
+    """
+    base = base[:max_length] or DEFAULT_SLUG
+    existing = list(
+        queryset.filter(_taken_q(base, max_length))
+        .values_list('slug', flat=True)
+    )
+    return _pick([base], set(existing), existing, max_length)[0]
+
+
+def allocate_many(queryset, bases, max_length):
+    """
+    Выдаёт уникальные slug сразу для многих заметок.
+
+    Повторы внутри пакета тоже получают суффиксы. Свободные базовые slug
+    проверяются запросом slug__in, а диапазоны суффиксов читаются только
+    для занятых; и то и другое пачками по BATCH_SIZE, так что на тысячу
+    заметок приходится несколько запросов.
+    """
+    bases = [base[:max_length] or DEFAULT_SLUG for base in bases]
+    unique_bases = list(dict.fromkeys(bases))
+    taken = set()
+    for start in range(0, len(unique_bases), BATCH_SIZE):
+        chunk = unique_bases[start:start + BATCH_SIZE]
+        taken.update(
+            queryset.filter(slug__in=chunk).values_list('slug', flat=True)
+        )
+    seen = set()
+    colliding = {}
+    for base in bases:
+        if base in taken or base in seen:
+            colliding[base] = None
+        seen.add(base)
+    colliding = list(colliding)
+    existing = []
+    for start in range(0, len(colliding), BATCH_SIZE):
+        chunk = colliding[start:start + BATCH_SIZE]
+        existing.extend(
+            queryset.filter(
+                reduce(or_, (_taken_q(base, max_length) for base in chunk))
+            ).values_list('slug', flat=True)
+        )
+    return _pick(bases, taken, existing, max_length)
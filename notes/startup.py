@@ -0,0 +1,111 @@
+"""
+Профиль холодного старта процесса Django.
+
+Старт замеряется в отдельном интерпретаторе с -X importtime: в текущем
+процессе всё уже импортировано. Дочерний процесс проходит те же шаги,
+что WSGI-воркер до первого запроса (настройки, django.setup(), URLconf,
+загрузка middleware), и печатает JSON с временем каждого шага, а Python
+пишет в stderr время импорта каждого модуля.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Выполняется в дочернем процессе. Шаги django.setup() отмечаются
+# обёртками AppConfig.import_models и ready каждого приложения.
+PROBE = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+timeline = []
+
+
+def mark(step):
+    timeline.append((step, (time.perf_counter() - started) * 1000))
+
+
+import django
+from django.apps.config import AppConfig
+from django.conf import settings
+
+mark('import django')
+settings.INSTALLED_APPS
+mark('settings')
+import_models = AppConfig.import_models
+
+
+def timed_import_models(self):
+    if not timeline[-1][0].startswith('models '):
+        mark('app configs')
+    import_models(self)
+    mark(f'models {self.label}')
+    ready = self.ready
+
+    def timed_ready():
+        ready()
+        mark(f'ready {self.label}')
+    self.ready = timed_ready
+
+
+AppConfig.import_models = timed_import_models
+django.setup(set_prefix=False)
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+mark('urlconf')
+from django.core.handlers.wsgi import WSGIHandler
+
+WSGIHandler()
+mark('middleware')
+json.dump({'timeline': timeline, 'modules': sorted(sys.modules)}, sys.stdout)
+'''
+
+
+def parse_importtime(stderr):
+    """
+    Строки -X importtime -> {модуль: (собственное, суммарное)} в мс.
+
+    Модуль, импортированный повторно (в другом интерпретаторе), не
+    повторяется: Python печатает каждый модуль один раз.
+    """
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, total, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        result[name.strip()] = (int(own) / 1000, int(total) / 1000)
+    return result
+
+
+def profile(settings_module, importtime=True, python=sys.executable):
+    """
+    Холодный старт с этими настройками в новом процессе.
+
+    -X importtime сам замедляет импорт на десятки процентов, поэтому
+    для сравнения с бюджетом времени его отключают (importtime=False,
+    imports тогда пуст).
+
+    Возвращает {'total_ms', 'timeline': [(шаг, мс от начала)],
+    'imports': {модуль: (собственное, суммарное) в мс},
+    'modules': [имена загруженных модулей]}.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    options = ['-X', 'importtime'] if importtime else []
+    completed = subprocess.run(
+        [python, *options, '-c', PROBE],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout)
+    result['imports'] = parse_importtime(completed.stderr)
+    result['total_ms'] = result['timeline'][-1][1]
+    return result
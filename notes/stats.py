@@ -0,0 +1,101 @@
+"""
+Статистика заметок пользователя: число заметок и длина текстов.
+
+Строка UserNoteStats меняется приращениями через F() в той же
+транзакции, что и заметка, поэтому параллельные правки не теряют
+обновлений. Массовые операции пересчитывают статистику затронутых
+пользователей целиком (recompute).
+
+Для шапки статистика читается из БД на каждой странице: это одна
+строка по ключу, а кеш в памяти процесса расходился бы между воркерами.
+"""
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import Note, UserNoteStats
+
+
+def apply_delta(user_id, notes=0, text_length=0, using=DEFAULT_DB_ALIAS):
+    """Прибавляет к статистике пользователя; строку создаёт при первой."""
+    if not notes and not text_length:
+        return
+    updated = UserNoteStats.objects.using(using).filter(
+        user_id=user_id
+    ).update(
+        note_count=F('note_count') + notes,
+        text_length=F('text_length') + text_length,
+        updated_at=timezone.now(),
+    )
+    if not updated and notes >= 0:
+        # Первая заметка или строка потеряна: считаем заново по заметкам,
+        # уже включая текущее изменение. При удалении строки может не быть,
+        # потому что удаляют самого пользователя.
+        recompute([user_id], using=using)
+
+
+def totals(user_ids, using=DEFAULT_DB_ALIAS):
+    """{user_id: (note_count, text_length)} по заметкам, одним запросом."""
+    rows = (
+        Note.objects.using(using)
+        .filter(author_id__in=user_ids)
+        .values('author_id')
+        .annotate(count=Count('id'), length=Sum('text_length'))
+        .values_list('author_id', 'count', 'length')
+    )
+    result = {user_id: (0, 0) for user_id in user_ids}
+    result.update(
+        (author_id, (count, length or 0))
+        for author_id, count, length in rows
+    )
+    return result
+
+
+def recompute(user_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Пересчитывает статистику пользователей по их заметкам.
+
+    Возвращает, сколько строк было неверными или отсутствовали.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    with transaction.atomic(using=using):
+        expected = totals(user_ids, using=using)
+        current = {
+            row.user_id: row
+            for row in UserNoteStats.objects.using(using)
+            .select_for_update().filter(user_id__in=user_ids)
+        }
+        changed = []
+        missing = []
+        for user_id, (count, length) in expected.items():
+            row = current.get(user_id)
+            if row is None:
+                missing.append(UserNoteStats(
+                    user_id=user_id, note_count=count, text_length=length
+                ))
+            elif (row.note_count, row.text_length) != (count, length):
+                row.note_count, row.text_length = count, length
+                row.updated_at = timezone.now()
+                changed.append(row)
+        UserNoteStats.objects.using(using).bulk_update(
+            changed, ('note_count', 'text_length', 'updated_at')
+        )
+        try:
+            with transaction.atomic(using=using):
+                UserNoteStats.objects.using(using).bulk_create(missing)
+        except IntegrityError:
+            # Строку параллельно создал другой пересчёт; он видел
+            # те же заметки.
+            pass
+    return len(changed) + len(missing)
+
+
+def for_user(user_id):
+    """Статистика для шапки: одна строка по ключу."""
+    return (
+        UserNoteStats.objects.filter(user_id=user_id)
+        .values('note_count', 'text_length')
+        .first()
+    ) or {'note_count': 0, 'text_length': 0}
@@ -0,0 +1,161 @@
+"""
+Очередь фоновых задач в базе данных.
+
+Побочные эффекты сохранения заметки (поисковый индекс, история правок)
+не выполняются в запросе, а ставятся в очередь через enqueue и
+выполняются воркером manage.py run_note_worker.
+
+Строка задачи пишется в той же транзакции, что и сама заметка, поэтому
+воркер видит задачу только после коммита, а при откате она пропадает
+вместе с изменениями. Задачи идемпотентны: они читают текущее состояние
+заметок, а не данные на момент постановки, так что несколько правок до
+запуска задачи сливаются в одну.
+
+При NOTES_TASKS_EAGER задачи выполняются сразу при постановке (тесты,
+локальная разработка без воркера).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from . import revisions, search
+from .models import Note, NoteTask
+
+logger = logging.getLogger('notes.tasks')
+
+HANDLERS = {}
+
+
+def handler(name):
+    """Регистрирует функцию как обработчик задачи name."""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+@handler('index_notes')
+def index_notes(note_ids, using=DEFAULT_DB_ALIAS):
+    """Переиндексирует заметки; удалённые убирает из индекса."""
+    rows = list(
+        Note.objects.using(using).filter(pk__in=note_ids)
+        .values_list('id', 'author_id', 'title', 'text')
+    )
+    search.index_rows(rows, using=using)
+    missing = set(note_ids) - {row[0] for row in rows}
+    if missing:
+        search.unindex_ids(missing, using=using)
+
+
+@handler('record_revisions')
+def record_revisions(note_ids, using=DEFAULT_DB_ALIAS):
+    """Записывает текущее состояние заметок в историю правок."""
+    notes = Note.objects.using(using).filter(pk__in=note_ids).only(
+        'id', 'title', 'text'
+    )
+    revisions.record_many(notes, using=using)
+
+
+@handler('sync_notes')
+def sync_notes(note_ids, steps, using=DEFAULT_DB_ALIAS):
+    """
+    Несколько задач над одними заметками одной строкой очереди.
+
+    Сохранение заметки обычно требует и переиндексации, и записи в
+    историю: отдельные задачи давали два одинаковых INSERT на запрос.
+    """
+    for step in steps:
+        HANDLERS[step](note_ids, using=using)
+
+
+def enqueue(name, using=DEFAULT_DB_ALIAS, **payload):
+    """Ставит задачу в очередь; payload должен сериализоваться в JSON."""
+    if name not in HANDLERS:
+        raise KeyError(f'Неизвестная задача {name}.')
+    if settings.NOTES_TASKS_EAGER:
+        HANDLERS[name](using=using, **payload)
+        return None
+    return NoteTask.objects.using(using).create(
+        name=name, payload={**payload, 'using': using}
+    )
+
+
+def _due(now):
+    return NoteTask.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        failed_at__isnull=True,
+        run_at__lte=now,
+    )
+
+
+def claim(limit):
+    """
+    Забирает до limit готовых к выполнению задач и возвращает их id.
+
+    Задача блокируется на NOTES_TASK_LEASE секунд; если воркер упадёт,
+    не закончив её, после этого её заберёт другой.
+    """
+    now = timezone.now()
+    queryset = _due(now).order_by('run_at')
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        _due(now).filter(pk__in=ids).update(
+            locked_until=now + timedelta(seconds=settings.NOTES_TASK_LEASE)
+        )
+    return ids
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед попыткой номер attempts + 1."""
+    return min(
+        settings.NOTES_TASK_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.NOTES_TASK_RETRY_MAX_DELAY,
+    )
+
+
+def run(task_id):
+    """Выполняет задачу; при ошибке откладывает её или помечает сбойной."""
+    task = NoteTask.objects.filter(pk=task_id).first()
+    if task is None:
+        return
+    try:
+        with transaction.atomic():
+            HANDLERS[task.name](**task.payload)
+    except Exception as error:
+        task.attempts += 1
+        task.last_error = f'{type(error).__name__}: {error}'
+        task.locked_until = None
+        now = timezone.now()
+        if task.attempts >= settings.NOTES_TASK_MAX_ATTEMPTS:
+            task.failed_at = now
+            logger.error('Задача %s не выполнена: %s', task, task.last_error)
+        else:
+            task.run_at = now + timedelta(seconds=retry_delay(task.attempts))
+            logger.warning('Задача %s отложена: %s', task, task.last_error)
+        task.save(update_fields=(
+            'attempts', 'last_error', 'locked_until', 'failed_at', 'run_at',
+        ))
+    else:
+        task.delete()
+
+
+def queue_stats():
+    """Глубина очереди: ждут, выполняются, сбойные и возраст старейшей."""
+    now = timezone.now()
+    pending = NoteTask.objects.filter(failed_at__isnull=True)
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    return {
+        'pending': pending.count(),
+        'due': _due(now).count(),
+        'running': pending.filter(locked_until__gte=now).count(),
+        'failed': NoteTask.objects.filter(failed_at__isnull=False).count(),
+        'oldest_age_s': (now - oldest).total_seconds() if oldest else 0.0,
+    }
@@ -0,0 +1,72 @@
+"""
+Быстрый slugify, побайтно совпадающий с pytils.translit.slugify.
+
+pytils перебирает таблицу транслитерации через str.replace на каждый
+символ таблицы и проверяет членство в списке алфавита. Здесь та же
+таблица один раз сворачивается в словарь для str.translate, а повторные
+заголовки берутся из ограниченного LRU-кеша.
+"""
+import re
+from functools import lru_cache
+
+AMPERSAND_RE = re.compile(r'&amp;|&')
+SPACES_RE = re.compile(r'[-\s]+')
+NON_WORD_RE = re.compile(r'[^\w\s-]')
+MEMO_SIZE = 4096
+
+
+class _Table(dict):
+    """Символы вне алфавита pytils удаляются."""
+
+    def __missing__(self, key):
+        return None
+
+
+@lru_cache(maxsize=None)
+def _table():
+    """
+    Таблица для str.translate: символ -> итог pytils для этого символа.
+
+    pytils сначала выкидывает символы вне алфавита, затем заменяет их по
+    TRANSTABLE (срабатывает первая подходящая пара) и удаляет всё, что не
+    \\w, пробел или дефис. Все три шага посимвольные, поэтому их можно
+    заранее вычислить для каждого символа алфавита. pytils импортируется
+    только при первом вызове, а не при импорте моделей.
+    """
+    from pytils.translit import ALPHABET, TRANSTABLE
+
+    table = _Table()
+    for symbol in ALPHABET:
+        if len(symbol) != 1 or ord(symbol) in table:
+            continue
+        replacement = next(
+            (out for source, out in TRANSTABLE if source == symbol), symbol
+        )
+        table[ord(symbol)] = NON_WORD_RE.sub('', replacement)
+    return table
+
+
+def _slugify(text):
+    text = AMPERSAND_RE.sub(' and ', text.lower())
+    text = SPACES_RE.sub('-', text)
+    return text.translate(_table()).strip().lower()
+
+
+_memo_slugify = lru_cache(maxsize=MEMO_SIZE)(_slugify)
+
+
+def slugify(text):
+    """Готовит строку для slug, как pytils.translit.slugify."""
+    return _memo_slugify(str(text))
+
+
+def slugify_many(texts):
+    """Slugify для пачки заголовков; одинаковые считаются один раз."""
+    memo = {}
+    result = []
+    for text in texts:
+        text = str(text)
+        if text not in memo:
+            memo[text] = _slugify(text)
+        result.append(memo[text])
+    return result
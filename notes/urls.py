@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api_urls, async_views, views
 
 app_name = 'notes'
 
@@ -11,5 +11,19 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('export/', views.NoteExport.as_view(), name='export'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    *api_urls.urlpatterns,
+    path('async/notes/', async_views.notes_list, name='async_list'),
+    path(
+        'async/note/<slug:slug>/',
+        async_views.note_detail,
+        name='async_detail',
+    ),
+    path(
+        'api/async/notes/',
+        async_views.api_notes_list,
+        name='api_async_list',
+    ),
 ]
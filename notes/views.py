@@ -1,9 +1,25 @@
+import hashlib
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
-from .models import Note
+from . import archive, cache, merge, routers, search, tags
+from .forms import WARNING, NoteForm
+from .mixins import OwnNotesMixin
+from .models import Note, NoteConflict, Tag
+from .pagination import keyset_paginate, parse_cursor
 
 
 class Home(generic.TemplateView):
@@ -16,14 +32,146 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
-class NoteBase(LoginRequiredMixin):
+class NoteBase(OwnNotesMixin):
     """Базовый класс для остальных CBV."""
-    model = Note
     success_url = reverse_lazy('notes:success')
 
-    def get_queryset(self):
-        """Пользователь может работать только со своими заметками."""
-        return self.model.objects.filter(author=self.request.user)
+    def form_valid(self, form):
+        """Slug могли занять параллельно: показываем ошибку, а не 500."""
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            # Остальные нарушения ограничений — ошибка, а не конфликт slug.
+            if not self.slug_taken(form.instance):
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+    @staticmethod
+    def slug_taken(note):
+        """Slug заметки занят другой заметкой; проверяется уже в БД."""
+        return Note.objects.filter(slug=note.slug).exclude(
+            pk=note.pk
+        ).exists()
+
+
+def note_stamp(request, slug):
+    """
+    Штамп заметки без загрузки текста: (id, updated_at, version,
+    note_count, stats_updated_at), последние два — из UserNoteStats
+    автора.
+
+    Запоминается на запросе: по нему одним запросом к БД считаются
+    ETag, Last-Modified, ключ кеша фрагмента и статистика для шапки.
+    """
+    if not hasattr(request, '_note_stamp'):
+        row = Note.objects.filter(
+            author=request.user, slug=slug
+        ).values_list(
+            'pk', 'updated_at', 'version',
+            'author__note_stats__note_count',
+            'author__note_stats__text_length',
+            'author__note_stats__updated_at',
+        ).first()
+        request._note_stamp = None
+        if row is not None:
+            pk, updated_at, version, note_count, text_length, stats_at = row
+            # Строки статистики может ещё не быть: LEFT JOIN даёт NULL.
+            request._note_stats = {
+                'note_count': note_count or 0,
+                'text_length': text_length or 0,
+            }
+            request._note_stamp = (
+                pk, updated_at, version, note_count or 0, stats_at
+            )
+    return request._note_stamp
+
+
+def note_etag(request, slug):
+    """
+    ETag страницы заметки по её штампу.
+
+    Шапка показывает число заметок, поэтому создание или удаление другой
+    заметки тоже меняет страницу: число входит в штамп и читается из БД
+    тем же запросом.
+    """
+    stamp = note_stamp(request, slug)
+    if stamp is None:
+        return None
+    pk, updated_at, _, note_count, _ = stamp
+    return f'note-{pk}-{updated_at.timestamp()}-{note_count}'
+
+
+def note_last_modified(request, slug):
+    """Правка заметки или изменение статистики автора, что позже."""
+    stamp = note_stamp(request, slug)
+    if stamp is None:
+        return None
+    _, updated_at, _, _, stats_at = stamp
+    return max(updated_at, stats_at or updated_at)
+
+
+def notes_list_stamp(request):
+    """
+    Штамп всех заметок автора для списка, запоминается на запросе.
+
+    Создание и правка сдвигают max(updated_at), удаление меняет count
+    и время статистики автора.
+    """
+    if not hasattr(request, '_notes_list_stamp'):
+        request._notes_list_stamp = Note.objects.filter(
+            author=request.user
+        ).aggregate(
+            count=Count('id'),
+            updated_at=Max('updated_at'),
+            stats_at=Max('author__note_stats__updated_at'),
+        )
+    return request._notes_list_stamp
+
+
+def notes_list_etag(request):
+    """ETag страницы списка: штамп заметок и параметры запроса."""
+    stamp = notes_list_stamp(request)
+    updated_at = stamp['updated_at'] and stamp['updated_at'].timestamp()
+    raw = (
+        f'{request.user.pk}:{stamp["count"]}:{updated_at}:'
+        f'{request.GET.urlencode()}:{NotesList.page_size}'
+    )
+    return 'notes-' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def notes_list_last_modified(request):
+    """
+    Last-Modified списка; без заметок не отдаём: удаление последней
+    не оставляет времени.
+    """
+    stamp = notes_list_stamp(request)
+    return max(
+        filter(None, (stamp['updated_at'], stamp['stats_at'])), default=None
+    )
+
+
+def note_fragment(queryset, stamp, template_name):
+    """
+    Тело страницы заметки по её штампу (note_stamp): из кеша, а при
+    промахе из БД с записью в кеш.
+    """
+    if stamp is None:
+        raise Http404('Заметка не найдена.')
+    pk, _, version, *_ = stamp
+    key = cache.detail_key(pk, version)
+    fragment = cache.get_fragment(key)
+    if fragment is None:
+        note = get_object_or_404(queryset, pk=pk)
+        fragment = render_to_string(template_name, {'note': note})
+        if routers.uses_replica(queryset.db):
+            cache.set_fragment(
+                key, fragment, settings.NOTES_REPLICA_FRAGMENT_TIMEOUT
+            )
+        else:
+            cache.set_fragment(key, fragment)
+    return fragment
 
 
 class NoteCreate(NoteBase, generic.CreateView):
@@ -32,9 +180,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -43,17 +189,169 @@ class NoteUpdate(NoteBase, generic.UpdateView):
     template_name = 'notes/form.html'
     form_class = NoteForm
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('folder')
+
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except NoteConflict:
+            return self.form_conflict(form)
+
+    def form_conflict(self, form):
+        """
+        Заметку сохранили параллельно: форма с трёхсторонним слиянием.
+
+        Ничего не сохраняется: слитая правка отправляется повторно, уже
+        с новой версией, и пользователь успевает её проверить.
+        """
+        self.object = current = self.get_object()
+        data = form.cleaned_data
+        text, conflicts = merge.merge(
+            data['base_text'], data['text'], current.text
+        )
+        title, title_conflict = merge.merge_value(
+            data['base_title'], data['title'], current.title
+        )
+        form = self.get_form_class()(instance=current, initial={
+            'title': title,
+            'text': text,
+            'slug': data['slug'],
+            'folder': data['folder'],
+            'tags': ', '.join(data['tags']),
+        })
+        return self.render_to_response(
+            self.get_context_data(form=form, conflict={
+                'current': current,
+                'conflicts': conflicts,
+                'title_conflict': title_conflict,
+            }),
+            status=HTTPStatus.CONFLICT,
+        )
+
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    def get_queryset(self):
+        """Для самого удаления текст не нужен: не читаем и не распаковываем."""
+        queryset = super().get_queryset()
+        if self.request.method == 'POST':
+            return queryset.defer('text')
+        return queryset
 
+
+@method_decorator(cache_control(private=True, no_cache=True), name='get')
+@method_decorator(condition(
+    etag_func=notes_list_etag, last_modified_func=notes_list_last_modified,
+), name='get')
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя, постранично по курсору.
+
+    Фильтры: ?tag=...&tag=... — заметки со всеми метками (с match=any —
+    с любой из них), ?folder=... — заметки из папки.
+    """
     template_name = 'notes/list.html'
+    read_replica = True
+    page_size = 100
+    list_fields = ('id', 'slug', 'title')
+    tag_cloud_size = 30
+
+    def get_queryset(self):
+        """Загружаем только поля, которые выводятся в списке."""
+        params = self.request.GET
+        queryset = tags.filter_notes(
+            super().get_queryset(),
+            self.request.user,
+            names=tags.parse_names(','.join(params.getlist('tag'))),
+            match_all=params.get('match') != 'any',
+            folder=params.get('folder'),
+        )
+        return tags.with_tag_list(queryset.only(*self.list_fields))
+
+    def get_context_data(self, **kwargs):
+        page = keyset_paginate(
+            self.object_list,
+            parse_cursor(self.request.GET.get('after')),
+            self.page_size,
+        )
+        filters = self.request.GET.copy()
+        filters.pop('after', None)
+        return super().get_context_data(
+            object_list=page.object_list,
+            next_cursor=page.next_cursor,
+            filters=filters.urlencode(),
+            tag_cloud=Tag.objects.filter(
+                author=self.request.user, note_count__gt=0
+            ).order_by('-note_count', 'name')[:self.tag_cloud_size],
+            **kwargs,
+        )
 
 
+@method_decorator(cache_control(private=True, no_cache=True), name='get')
+@method_decorator(condition(
+    etag_func=note_etag, last_modified_func=note_last_modified,
+), name='get')
 class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    """Заметка подробно; тело страницы берётся из кеша фрагментов."""
     template_name = 'notes/detail.html'
+    read_replica = True
+    fragment_template_name = 'includes/note_detail.html'
+
+    def get(self, request, *args, **kwargs):
+        fragment = note_fragment(
+            self.get_queryset(),
+            note_stamp(request, kwargs[self.slug_url_kwarg]),
+            self.fragment_template_name,
+        )
+        return self.render_to_response({'view': self, 'note_html': fragment})
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    read_replica = True
+    results_limit = 50
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        if not self.query:
+            return []
+        return search.search(
+            super().get_queryset().only(*NotesList.list_fields),
+            self.request.user,
+            self.query,
+            limit=self.results_limit,
+        )
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(query=self.query, **kwargs)
+
+
+class NoteExport(NoteBase, generic.View):
+    """Все заметки пользователя одним ZIP-архивом файлов Markdown."""
+    chunk_size = 500
+    filename = 'notes.zip'
+
+    def get_files(self):
+        notes = self.get_queryset().only(
+            'slug', 'title', 'text', 'updated_at'
+        ).order_by('pk').iterator(chunk_size=self.chunk_size)
+        for note in notes:
+            yield (
+                f'{note.slug}.md',
+                timezone.localtime(note.updated_at).timetuple()[:6],
+                f'# {note.title}\n\n{note.text}\n'.encode(),
+            )
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(
+            archive.stream_zip(self.get_files()),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.filename}"'
+        )
+        return response
@@ -0,0 +1,5 @@
+"""
+SQLite для боевой нагрузки: WAL, настройки соединения и один писатель.
+
+    DATABASES = {'default': {'ENGINE': 'yanote.db.sqlite3', ...}}
+"""
@@ -0,0 +1,96 @@
+"""
+Бэкенд sqlite3 с настройками для конкурентной нагрузки.
+
+При открытии соединения включаются WAL (читатели не ждут писателя),
+synchronous=NORMAL, mmap и busy_timeout. Набор PRAGMA можно дополнить или
+переопределить через OPTIONS['pragmas'].
+
+Транзакции atomic начинаются с BEGIN IMMEDIATE: блокировка записи берётся
+сразу, а не при первом INSERT, поэтому две транзакции не упираются друг в
+друга при повышении блокировки (это SQLITE_BUSY, который busy_timeout не
+лечит). Внутри процесса пишущие транзакции к одному файлу выстраиваются
+в очередь на threading.Lock, чтобы потоки ждали друг друга без опроса
+файловой блокировки.
+"""
+import threading
+
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    """Общая для процесса блокировка записи в файл базы."""
+    with _write_locks_guard:
+        return _write_locks.setdefault(name, threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._holds_write_lock = False
+
+    @property
+    def pragmas(self):
+        return {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+
+    @property
+    def write_timeout(self):
+        """Сколько ждать очереди писателей, в секундах."""
+        return self.pragmas['busy_timeout'] / 1000
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        lock = write_lock(str(self.settings_dict['NAME']))
+        if not lock.acquire(timeout=self.write_timeout):
+            raise OperationalError('database is locked')
+        self._holds_write_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            write_lock(str(self.settings_dict['NAME'])).release()
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self._release_write_lock()
@@ -22,13 +22,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.instrumentation.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'notes.auth.CachedAuthenticationMiddleware',
+    # После аутентификации: лимит считается по пользователю.
+    'notes.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'notes.routers.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -37,6 +41,8 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
+        # При DEBUG = False Django сам оборачивает загрузчики в
+        # cached.Loader: шаблоны разбираются один раз на процесс.
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -44,6 +50,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notes.context_processors.note_stats',
             ],
         },
     },
@@ -53,12 +60,60 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
 DATABASES = {
+    # WAL, BEGIN IMMEDIATE и очередь писателей, см. yanote.db.sqlite3.
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanote.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+    },
+    # Копия основной базы только для чтения; используется, если указана
+    # в NOTES_READ_REPLICAS.
+    'replica': {
+        'ENGINE': 'yanote.db.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+    },
+}
+
+DATABASE_ROUTERS = ['notes.routers.ReadReplicaRouter']
+
+# Алиасы реплик для представлений только для чтения; пусто — всё читается
+# из основной базы.
+NOTES_READ_REPLICAS = []
+
+# Сколько секунд после записи чтения клиента идут в основную базу.
+NOTES_PRIMARY_PIN_SECONDS = 5
+
+# Фрагменты, прочитанные с реплики, кешируются ненадолго: версия заметки
+# и её текст могут прийти с разных реплик, одна из которых отстаёт.
+NOTES_REPLICA_FRAGMENT_TIMEOUT = 30
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # LocMemCache вытесняет давно не читанные ключи (LRU) сверх MAX_ENTRIES.
+    'notes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000,
+        },
+    },
 }
 
+NOTES_CACHE_ALIAS = 'notes'
+
+# С общим для процессов кешем (Redis, Memcached) сессия читается из него,
+# а в БД только пишется. С LocMemCache копия сессии у каждого воркера
+# своя, и выход в одном не закрыл бы её в остальных: тогда только БД.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.db'
+    if CACHES['default']['BACKEND'].endswith('.LocMemCache')
+    else 'django.contrib.sessions.backends.cached_db'
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +142,43 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# 'auto' — FTS5, если таблица индекса создана, иначе таблица токенов.
+NOTES_SEARCH_BACKEND = 'auto'
+
+# История правок: полный снимок текста раз в столько версий, хранится
+# столько последних версий заметки.
+NOTES_REVISION_SNAPSHOT_INTERVAL = 50
+NOTES_REVISIONS_KEEP = 500
+
+# Фоновые задачи (notes.tasks): при EAGER выполняются сразу, без воркера.
+NOTES_TASKS_EAGER = False
+NOTES_TASK_LEASE = 5 * 60
+NOTES_TASK_MAX_ATTEMPTS = 5
+NOTES_TASK_RETRY_DELAY = 2
+NOTES_TASK_RETRY_MAX_DELAY = 10 * 60
+
+# Лимиты изменяющих запросов по имени URL: 'число/период' (s, m, h, d).
+NOTES_RATE_LIMITS = {
+    'notes:add': '30/m',
+    'notes:edit': '60/m',
+    'notes:delete': '60/m',
+    'notes:api_list': '60/m',
+    'notes:api_batch': '10/m',
+    'notes:api_detail': '60/m',
+    'users:signup': '5/h',
+}
+# 'notes.ratelimit.CacheBackend' — общие лимиты для нескольких процессов.
+NOTES_RATE_LIMIT_BACKEND = 'notes.ratelimit.MemoryBackend'
+NOTES_RATE_LIMIT_CACHE = 'default'
+
+# Сколько SQL-запросов допускается на один запрос к представлению.
+# Включая чтение сессии и пользователя: с LocMemCache они всегда из БД.
+NOTES_QUERY_BUDGETS = {
+    'notes:list': 9,
+    'notes:detail': 6,
+    'notes:add': 14,
+    'notes:edit': 18,
+    'notes:search': 6,
+    'notes:api_list': 5,
+}
@@ -0,0 +1,37 @@
+"""
+Настройки воркера только с JSON API.
+
+Без админки, сообщений, статики и HTML-страниц: процесс быстрее
+стартует, что важно при автомасштабировании. Запуск:
+DJANGO_SETTINGS_MODULE=yanote.settings_api. Время старта показывает
+manage.py profile_startup --settings-module yanote.settings_api.
+"""
+from yanote.settings import *  # noqa: F401,F403
+from yanote.settings import MIDDLEWARE, TEMPLATES
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'notes.apps.NotesConfig',
+]
+
+MIDDLEWARE = [
+    name for name in MIDDLEWARE
+    if name not in (
+        'django.contrib.messages.middleware.MessageMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    )
+]
+
+ROOT_URLCONF = 'yanote.urls_api'
+
+# API отвечает JSON; шаблоны нужны только страницам ошибок Django.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'DIRS': [],
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [],
+    },
+}]